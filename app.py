@@ -1,60 +1,134 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
-from main import Session, User, Jobs, Department, Category, association_table
-import requests
+from models import Session, User, Jobs, Department, Category, configure_engine
 import urllib.parse 
-
-from jobs_api import jobs_api
+import click
+
+import auth
+import category_cache
+import database
+import instrumentation
+import metrics
+import passwords
+import response_cache
+import user_service
+
+from jobs_api import jobs_api, JOB_FIELDS, apply_jobs_filter, job_rows_to_dicts, select_job_rows
 from user_api import user_api
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = '1240124=142-=4-124-214099124'
-
-app.register_blueprint(jobs_api)
-app.register_blueprint(user_api)
+from departments_api import departments_api, get_departments_with_details
+from reports_api import reports_api
+from metrics_api import metrics_api
+from cache_api import cache_api
+
+DEFAULT_CONFIG = {
+    'SECRET_KEY': '1240124=142-=4-124-214099124',
+    'AUTH_PAYLOAD_LOADER': True,
+    'AUTH_VERSION_TTL': 30,
+    'USER_API_URL': None,
+    'PASSWORD_HASH_METHOD': passwords.DEFAULT_METHOD,
+    'PASSWORD_HASH_WORKERS': passwords.default_workers(),
+    'PASSWORD_HASH_QUEUE_DEPTH': None,
+}
+
+JOB_BOARD_PAGE_SIZE = 50
+MAX_JOB_BOARD_PAGE_SIZE = 200
+JOB_BOARD_FILTERS = ('q', 'team_leader', 'is_finished')
+
+views = Blueprint('views', __name__)
 
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'views.login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    session = Session()
-    user = session.query(User).get(int(user_id))
-    session.close()
-    return user
-
-@app.route('/')
+    return auth.load_user(user_id)
+
+def hashing_overloaded(error):
+    headers = {'Retry-After': '1'}
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'Server is busy, try again later'}), 503, headers
+    return 'Server is busy, try again later', 503, headers
+
+def render_job_rows(session, jobs, leaders):
+    rows = {}
+    missing = []
+    for job in jobs:
+        version = (job.modified_date, leaders.get(job.team_leader))
+        cached = response_cache.fragments.get(job.id, version)
+        if cached is not None:
+            rows[job.id] = cached[0]
+        else:
+            missing.append(job)
+    if missing:
+        details = job_rows_to_dicts(
+            session.execute(select_job_rows(JOB_FIELDS).where(Jobs.id.in_([job.id for job in missing]))).all(),
+            JOB_FIELDS
+        )
+        details = {job['id']: job for job in details}
+        for job in missing:
+            leader = leaders.get(job.team_leader)
+            html = render_template('job_row.html', job=details[job.id], leader=leader)
+            response_cache.fragments.set(job.id, (job.modified_date, leader), ('jobs',), html, None)
+            rows[job.id] = html
+    return rows
+
+@views.route('/')
 def index():
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', JOB_BOARD_PAGE_SIZE, type=int), 1), MAX_JOB_BOARD_PAGE_SIZE)
+    filters = {key: request.args[key] for key in JOB_BOARD_FILTERS if request.args.get(key)}
+
     session = Session()
-    jobs = session.query(Jobs).options(joinedload(Jobs.team_leader_user)).all()
-    users = {u.id: u.full_name for u in session.query(User).all()}
-    categories = {c.id: c.name for c in session.query(Category).all()}
+    try:
+        query = apply_jobs_filter(session, select(Jobs.id, Jobs.team_leader, Jobs.modified_date), filters)
+    except ValueError:
+        flash('Invalid filter value.')
+        query = select(Jobs.id, Jobs.team_leader, Jobs.modified_date)
+    jobs = session.execute(query.order_by(Jobs.id).limit(per_page + 1).offset((page - 1) * per_page)).all()
+    has_next = len(jobs) > per_page
+    jobs = jobs[:per_page]
+    leader_ids = {job.team_leader for job in jobs}
+    leaders = {}
+    if leader_ids:
+        for user_id, surname, name in session.execute(
+            select(User.id, User.surname, User.name).where(User.id.in_(leader_ids))
+        ):
+            leaders[user_id] = f"{surname} {name}"
+    rows = render_job_rows(session, jobs, leaders)
     session.close()
-    return render_template('index.html', jobs=jobs, users=users, categories=categories)
+    return render_template('index.html', jobs=jobs, rows=rows, page=page, per_page=per_page,
+                           has_next=has_next, filters=filters)
 
-@app.route('/login', methods=['GET', 'POST'])
+@views.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
         session = Session()
-        user = session.query(User).filter(User.email == email).first()
-        session.close()
+        try:
+            user = session.query(User).filter(User.email == email).first()
+            authenticated = user is not None and user.check_password(password)
+            if authenticated and user.password_needs_rehash():
+                user.rehash_password(password)
+                session.commit()
+                session.refresh(user)
+        finally:
+            session.close()
 
-        if user and user.check_password(password):
+        if authenticated:
             login_user(user)
+            auth.remember_user(user)
             next_page = request.args.get('next')
-            return redirect(next_page) if next_page else redirect(url_for('index'))
+            return redirect(next_page) if next_page else redirect(url_for('views.index'))
         else:
             flash('Invalid email or password')
     return render_template('login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@views.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
-        session = Session()
         surname = request.form['surname']
         name = request.form['name']
         age = int(request.form['age'])
@@ -67,40 +141,43 @@ def register():
 
         if password != password_confirm:
             flash('Passwords do not match!')
-            session.close()
-            return redirect(url_for('register'))
+            return redirect(url_for('views.register'))
 
-        existing_user = session.query(User).filter(User.email == email).first()
-        if existing_user:
-            flash('Email already registered.')
+        session = Session()
+        try:
+            existing_user = session.query(User).filter(User.email == email).first()
+            if existing_user:
+                flash('Email already registered.')
+                return redirect(url_for('views.register'))
+
+            new_user = User(
+                surname=surname,
+                name=name,
+                age=age,
+                position=position,
+                speciality=speciality,
+                address=address,
+                email=email,
+            )
+            new_user.set_password(password)
+            session.add(new_user)
+            session.commit()
+        finally:
             session.close()
-            return redirect(url_for('register'))
-
-        new_user = User(
-            surname=surname,
-            name=name,
-            age=age,
-            position=position,
-            speciality=speciality,
-            address=address,
-            email=email,
-        )
-        new_user.set_password(password)
-        session.add(new_user)
-        session.commit()
-        session.close()
+        response_cache.invalidate('users')
         flash('Registration successful. Please log in.')
-        return redirect(url_for('login'))
+        return redirect(url_for('views.login'))
 
     return render_template('register.html')
 
-@app.route('/logout')
+@views.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    auth.forget_user()
+    return redirect(url_for('views.index'))
 
-@app.route('/add_job', methods=['GET', 'POST'])
+@views.route('/add_job', methods=['GET', 'POST'])
 @login_required
 def add_job():
     if request.method == 'POST':
@@ -116,19 +193,17 @@ def add_job():
             team_leader=team_leader_id,
             job=job_description,
             work_size=work_size,
-            collaborators=collaborators_str,
             is_finished=is_finished
         )
+        new_job.set_collaborators(session, collaborators_str)
 
-        for cat_id in category_ids:
-            category = session.query(Category).get(int(cat_id))
-            if category:
-                new_job.categories.append(category)
+        new_job.categories = category_cache.categories_by_ids(session, [int(cat_id) for cat_id in category_ids])
 
         session.add(new_job)
         session.commit()
+        response_cache.invalidate('jobs')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
     session = Session()
     users = session.query(User).all()
@@ -136,7 +211,7 @@ def add_job():
     session.close()
     return render_template('add_job.html', users=users, categories=categories)
 
-@app.route('/edit_job/<int:job_id>', methods=['GET', 'POST'])
+@views.route('/edit_job/<int:job_id>', methods=['GET', 'POST'])
 @login_required
 def edit_job(job_id):
     session = Session()
@@ -144,35 +219,33 @@ def edit_job(job_id):
     if not job:
         flash('Job not found.')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
-    if job.team_leader_user != current_user and current_user.id != 1:
+    if job.team_leader != current_user.id and not current_user.is_admin:
         flash('You cannot edit this job.')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
     if request.method == 'POST':
         job.job = request.form['job_description']
         job.work_size = int(request.form['work_size'])
-        job.collaborators = request.form['collaborators']
+        job.set_collaborators(session, request.form['collaborators'])
         job.is_finished = request.form.get('is_finished') == 'on'
-        job.categories.clear()
+        job.touch()
         category_ids = request.form.getlist('categories')
-        for cat_id in category_ids:
-            category = session.query(Category).get(int(cat_id))
-            if category:
-                job.categories.append(category)
+        job.categories = category_cache.categories_by_ids(session, [int(cat_id) for cat_id in category_ids])
 
         session.commit()
+        response_cache.invalidate('jobs')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
     users = session.query(User).all()
     categories = session.query(Category).all()
     session.close()
     return render_template('edit_job.html', job=job, users=users, categories=categories)
 
-@app.route('/delete_job/<int:job_id>')
+@views.route('/delete_job/<int:job_id>')
 @login_required
 def delete_job(job_id):
     session = Session()
@@ -180,27 +253,27 @@ def delete_job(job_id):
     if not job:
         flash('Job not found.')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
-    if job.team_leader_user != current_user and current_user.id != 1:
+    if job.team_leader != current_user.id and not current_user.is_admin:
         flash('You cannot delete this job.')
         session.close()
-        return redirect(url_for('index'))
+        return redirect(url_for('views.index'))
 
     session.delete(job)
     session.commit()
+    response_cache.invalidate('jobs')
     session.close()
-    return redirect(url_for('index'))
+    return redirect(url_for('views.index'))
 
-@app.route('/departments')
+@views.route('/departments')
 def departments():
     session = Session()
-    depts = session.query(Department).all()
-    users = {u.id: u.full_name for u in session.query(User).all()}
+    depts = get_departments_with_details(session)
     session.close()
-    return render_template('departments.html', depts=depts, users=users)
+    return render_template('departments.html', depts=depts)
 
-@app.route('/add_department', methods=['GET', 'POST'])
+@views.route('/add_department', methods=['GET', 'POST'])
 @login_required
 def add_department():
     if request.method == 'POST':
@@ -213,20 +286,20 @@ def add_department():
         new_dept = Department(
             title=title,
             chief=chief_id,
-            members=members_str,
             email=email
         )
+        new_dept.set_members(session, members_str)
         session.add(new_dept)
         session.commit()
         session.close()
-        return redirect(url_for('departments'))
+        return redirect(url_for('views.departments'))
 
     session = Session()
     users = session.query(User).all()
     session.close()
     return render_template('add_department.html', users=users)
 
-@app.route('/edit_department/<int:dept_id>', methods=['GET', 'POST'])
+@views.route('/edit_department/<int:dept_id>', methods=['GET', 'POST'])
 @login_required
 def edit_department(dept_id):
     session = Session()
@@ -234,23 +307,23 @@ def edit_department(dept_id):
     if not dept:
         flash('Department not found.')
         session.close()
-        return redirect(url_for('departments'))
+        return redirect(url_for('views.departments'))
 
     if request.method == 'POST':
         dept.title = request.form['title']
         dept.chief = int(request.form['chief_id'])
-        dept.members = request.form['members']
+        dept.set_members(session, request.form['members'])
         dept.email = request.form['email']
 
         session.commit()
         session.close()
-        return redirect(url_for('departments'))
+        return redirect(url_for('views.departments'))
 
     users = session.query(User).all()
     session.close()
     return render_template('edit_department.html', dept=dept, users=users)
 
-@app.route('/delete_department/<int:dept_id>')
+@views.route('/delete_department/<int:dept_id>')
 @login_required
 def delete_department(dept_id):
     session = Session()
@@ -258,32 +331,80 @@ def delete_department(dept_id):
     if not dept:
         flash('Department not found.')
         session.close()
-        return redirect(url_for('departments'))
+        return redirect(url_for('views.departments'))
 
     session.delete(dept)
     session.commit()
     session.close()
-    return redirect(url_for('departments'))
+    return redirect(url_for('views.departments'))
 
-@app.route('/users_show/<int:user_id>')
+@views.route('/users_show/<int:user_id>')
 def users_show(user_id):
-    api_url = url_for('user_api.get_user', user_id=user_id, _external=True)
-    try:
-        response = requests.get(api_url)
-        if response.status_code == 200:
-            user_data = response.json().get('user', {})
-            city_from = user_data.get('city_from')
-            full_name = f"{user_data.get('surname', '')} {user_data.get('name', '')}".strip()
-            if not city_from:
-                return f"User {user_id} does not have a 'city_from' specified.", 404
-            encoded_city = urllib.parse.quote(city_from)
-            yandex_maps_url = f"https://yandex.ru/maps/?text={encoded_city}"
-            return render_template('user_map.html', user_full_name=full_name, city=city_from, yandex_url=yandex_maps_url)
-        else:
-            return f"Error fetching user data from API: {response.status_code}", 500
-    except requests.exceptions.RequestException as e:
-        return f"Error making request to API: {str(e)}", 500
+    api_base_url = current_app.config.get('USER_API_URL')
+    if api_base_url:
+        import requests
+        try:
+            user_data = user_service.fetch_remote_user(api_base_url, user_id)
+        except requests.exceptions.RequestException as e:
+            return f"Error making request to API: {str(e)}", 500
+    else:
+        user_data = user_service.get_user(user_id)
+
+    if not user_data:
+        return f"User {user_id} not found.", 404
+    city_from = user_data.get('city_from')
+    full_name = f"{user_data.get('surname', '')} {user_data.get('name', '')}".strip()
+    if not city_from:
+        return f"User {user_id} does not have a 'city_from' specified.", 404
+    encoded_city = urllib.parse.quote(city_from)
+    yandex_maps_url = f"https://yandex.ru/maps/?text={encoded_city}"
+    return render_template('user_map.html', user_full_name=full_name, city=city_from, yandex_url=yandex_maps_url)
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    app.config.from_mapping(database.config_from_env())
+    app.config.from_mapping(config or {})
+    configure_engine(app.config)
+    passwords.configure(app.config)
+    response_cache.configure(app.config)
+
+    app.register_blueprint(views)
+    app.register_blueprint(jobs_api)
+    app.register_blueprint(user_api)
+    app.register_blueprint(departments_api)
+    app.register_blueprint(reports_api)
+    app.register_blueprint(cache_api)
+    app.register_blueprint(metrics_api)
+    login_manager.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    app.register_error_handler(passwords.HashingOverloaded, hashing_overloaded)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        from migrations import init_db
+        init_db(verbose=True)
+
+    @app.cli.command('migrate', context_settings={'ignore_unknown_options': True})
+    @click.argument('args', nargs=-1, type=click.UNPROCESSED)
+    def migrate_command(args):
+        from migrations import main as migrate
+        migrate(list(args))
+
+    @app.cli.command('generate', context_settings={'ignore_unknown_options': True})
+    @click.argument('args', nargs=-1, type=click.UNPROCESSED)
+    def generate_command(args):
+        from datagen import main as generate
+        generate(list(args))
+
+    @app.cli.command('seed')
+    def seed_command():
+        from seed import seed_database
+        print('Seeded colonists.' if seed_database() else 'Database already has users, nothing seeded.')
+
+    return app
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,100 @@
+import threading
+import time
+from flask import current_app, session as flask_session
+from sqlalchemy import select
+from models import Session, User
+
+PAYLOAD_KEY = '_user_payload'
+DEFAULT_VERSION_TTL = 30
+
+PAYLOAD_FIELDS = ('id', 'surname', 'name', 'email', 'credential_version')
+FLASK_LOGIN_KEYS = ('_user_id', '_fresh', '_id')
+
+# user id -> (payload, verified at). Trusted without a query for AUTH_VERSION_TTL seconds, so
+# a credential change made in another process takes at most that long to end its sessions.
+_verified_payloads = {}
+_lock = threading.Lock()
+
+def user_payload(user):
+    return {
+        'id': user.id,
+        'surname': user.surname,
+        'name': user.name,
+        'email': user.email,
+        'credential_version': user.credential_version or 0
+    }
+
+def user_from_payload(payload):
+    return User(
+        id=payload['id'],
+        surname=payload['surname'],
+        name=payload['name'],
+        email=payload['email'],
+        credential_version=payload['credential_version']
+    )
+
+def remember_user(user):
+    flask_session[PAYLOAD_KEY] = user_payload(user)
+
+def forget_user():
+    flask_session.pop(PAYLOAD_KEY, None)
+
+def revoke_session():
+    forget_user()
+    for key in FLASK_LOGIN_KEYS:
+        flask_session.pop(key, None)
+    flask_session['_remember'] = 'clear'
+
+def invalidate_user(user_id):
+    with _lock:
+        _verified_payloads.pop(user_id, None)
+
+def current_payload(user_id, refresh=False):
+    ttl = current_app.config.get('AUTH_VERSION_TTL', DEFAULT_VERSION_TTL)
+    now = time.monotonic()
+    with _lock:
+        cached = _verified_payloads.get(user_id)
+    if cached and not refresh and now - cached[1] < ttl:
+        return cached[0]
+
+    session = Session()
+    row = session.execute(
+        select(*(getattr(User, field) for field in PAYLOAD_FIELDS)).where(User.id == user_id)
+    ).first()
+    session.close()
+    payload = dict(zip(PAYLOAD_FIELDS, row)) if row else None
+    with _lock:
+        if payload is None:
+            _verified_payloads.pop(user_id, None)
+        else:
+            _verified_payloads[user_id] = (payload, now)
+    return payload
+
+def load_user(user_id):
+    user_id = int(user_id)
+    payload = flask_session.get(PAYLOAD_KEY)
+    if payload and payload.get('id') != user_id:
+        payload = None
+
+    if payload and current_app.config.get('AUTH_PAYLOAD_LOADER', True):
+        current = current_payload(user_id)
+        if current is not None and current['credential_version'] != payload['credential_version']:
+            # The session may be newer than this process's entry (e.g. a login after a password change).
+            current = current_payload(user_id, refresh=True)
+        # A credential change (password, email, deletion) ends every session issued before it.
+        if current is None or current['credential_version'] != payload['credential_version']:
+            revoke_session()
+            return None
+        if current != payload:
+            flask_session[PAYLOAD_KEY] = current
+        return user_from_payload(current)
+
+    session = Session()
+    user = session.get(User, user_id)
+    session.close()
+    if user is None or (payload and (user.credential_version or 0) != payload['credential_version']):
+        revoke_session()
+        return None
+    if user_payload(user) != payload:
+        remember_user(user)
+    return user
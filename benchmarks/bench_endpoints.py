@@ -0,0 +1,213 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from app import create_app
+from models import configure_engine, get_engine
+from datagen import DEFAULT_PASSWORD as BENCH_PASSWORD, generate
+
+BENCH_EMAIL = 'user1@mars.org'
+BENCHMARKED_BLUEPRINTS = ('views', 'jobs_api', 'user_api')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+NEW_ID_OFFSET = 10_000_000
+
+def job_json(job_id):
+    return {'id': job_id, 'team_leader': 1, 'job': f'benchmark job {job_id}', 'work_size': 5,
+            'collaborators': '2, 3', 'categories': ['Research']}
+
+def user_json(user_id):
+    return {'id': user_id, 'surname': 'Bench', 'name': f'User{user_id}', 'age': 30, 'position': 'junior',
+            'speciality': 'pilot', 'address': 'module_1', 'email': f'bench{user_id}@mars.org',
+            'password': BENCH_PASSWORD}
+
+def bulk_jobs_body(i):
+    first = NEW_ID_OFFSET * 2 + i * 100
+    return '\n'.join(json.dumps(job_json(job_id)) for job_id in range(first, first + 100))
+
+# (name, endpoint, method, build(i, scale) -> (url, request kwargs), max requests or None)
+REQUESTS = [
+    ('index', 'views.index', 'GET', lambda i, s: ('/', {}), None),
+    ('index filtered', 'views.index', 'GET', lambda i, s: ('/?is_finished=no&page=3', {}), None),
+    ('departments', 'views.departments', 'GET', lambda i, s: ('/departments', {}), None),
+    ('users_show', 'views.users_show', 'GET', lambda i, s: (f"/users_show/{i % s['users'] + 1}", {}), None),
+    ('login form', 'views.login', 'GET', lambda i, s: ('/login', {}), None),
+    ('login', 'views.login', 'POST', lambda i, s: ('/login', {'data': {
+        'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}}), 10),
+    ('register form', 'views.register', 'GET', lambda i, s: ('/register', {}), None),
+    ('register', 'views.register', 'POST', lambda i, s: ('/register', {'data': {
+        'surname': 'Bench', 'name': f'Register{i}', 'age': 30, 'position': 'junior', 'speciality': 'pilot',
+        'address': 'module_1', 'email': f'register{i}@mars.org', 'password': BENCH_PASSWORD,
+        'password_confirm': BENCH_PASSWORD}}), 10),
+    ('add_job form', 'views.add_job', 'GET', lambda i, s: ('/add_job', {}), None),
+    ('add_job', 'views.add_job', 'POST', lambda i, s: ('/add_job', {'data': {
+        'team_leader_id': 1, 'job_description': f'html job {i}', 'work_size': 3, 'collaborators': '2, 3',
+        'categories': ['1', '2']}}), None),
+    ('edit_job form', 'views.edit_job', 'GET', lambda i, s: (f"/edit_job/{i % s['jobs'] + 1}", {}), None),
+    ('edit_job', 'views.edit_job', 'POST', lambda i, s: (f"/edit_job/{i % s['jobs'] + 1}", {'data': {
+        'job_description': f'edited job {i}', 'work_size': 4, 'collaborators': '2', 'categories': ['3']}}), None),
+    ('delete_job', 'views.delete_job', 'GET', lambda i, s: (f"/delete_job/{s['jobs'] - i}", {}), None),
+    ('add_department form', 'views.add_department', 'GET', lambda i, s: ('/add_department', {}), None),
+    ('add_department', 'views.add_department', 'POST', lambda i, s: ('/add_department', {'data': {
+        'title': f'Bench department {i}', 'chief_id': 1, 'members': '2, 3',
+        'email': f'bench-department{i}@mars.org'}}), None),
+    ('edit_department form', 'views.edit_department', 'GET',
+     lambda i, s: (f"/edit_department/{i % s['departments'] + 1}", {}), None),
+    ('edit_department', 'views.edit_department', 'POST',
+     lambda i, s: (f"/edit_department/{i % s['departments'] + 1}", {'data': {
+         'title': f'Department {i}', 'chief_id': 1, 'members': '2, 3, 4',
+         'email': f'department-edit{i}@mars.org'}}), None),
+    ('delete_department', 'views.delete_department', 'GET',
+     lambda i, s: (f"/delete_department/{s['departments'] - i}", {}), 5),
+    ('logout', 'views.logout', 'GET', lambda i, s: ('/logout', {}), 1),
+
+    ('get_jobs', 'jobs_api.get_jobs', 'GET', lambda i, s: ('/api/jobs', {}), None),
+    ('get_jobs page', 'jobs_api.get_jobs', 'GET', lambda i, s: (f"/api/jobs?after={s['jobs'] // 2}", {}), None),
+    ('get_jobs unfinished', 'jobs_api.get_jobs', 'GET',
+     lambda i, s: ('/api/jobs?is_finished=false&work_size_max=19', {}), None),
+    ('get_jobs category', 'jobs_api.get_jobs', 'GET', lambda i, s: ('/api/jobs?category=Geology', {}), None),
+    ('get_jobs date range', 'jobs_api.get_jobs', 'GET',
+     lambda i, s: ('/api/jobs?start_after=2022-01-01&start_before=2022-02-01', {}), None),
+    ('get_job', 'jobs_api.get_job', 'GET', lambda i, s: (f"/api/jobs/{i * 7919 % s['jobs'] + 1}", {}), None),
+    ('search_jobs', 'jobs_api.search_jobs', 'GET', lambda i, s: ('/api/jobs/search?q=geology', {}), None),
+    ('export_jobs', 'jobs_api.export_jobs', 'GET', lambda i, s: ('/api/jobs/export', {}), 3),
+    ('add_job api', 'jobs_api.add_job', 'POST', lambda i, s: ('/api/jobs', {'json': job_json(NEW_ID_OFFSET + i)}), None),
+    ('edit_job api', 'jobs_api.edit_job_api', 'PUT',
+     lambda i, s: (f'/api/jobs/{NEW_ID_OFFSET + i}', {'json': {'work_size': 9, 'categories': ['Geology']}}), None),
+    ('delete_job api', 'jobs_api.delete_job_api', 'DELETE', lambda i, s: (f'/api/jobs/{NEW_ID_OFFSET + i}', {}), None),
+    ('bulk_add_jobs x100', 'jobs_api.bulk_add_jobs', 'POST', lambda i, s: ('/api/jobs/bulk', {
+        'data': bulk_jobs_body(i), 'content_type': 'application/x-ndjson'}), 10),
+
+    ('get_users', 'user_api.get_users', 'GET', lambda i, s: ('/api/users', {}), None),
+    ('get_users filtered', 'user_api.get_users', 'GET',
+     lambda i, s: ('/api/users?address=module_3&age_min=30&count=true', {}), None),
+    ('get_user', 'user_api.get_user', 'GET', lambda i, s: (f"/api/users/{i * 7919 % s['users'] + 1}", {}), None),
+    ('export_users', 'user_api.export_users', 'GET', lambda i, s: ('/api/users/export', {}), 3),
+    ('add_user api', 'user_api.add_user', 'POST', lambda i, s: ('/api/users', {'json': user_json(NEW_ID_OFFSET + i)}), 10),
+    ('edit_user api', 'user_api.edit_user_api', 'PUT',
+     lambda i, s: (f'/api/users/{NEW_ID_OFFSET + i}', {'json': {'age': 31}}), 10),
+    ('delete_user api', 'user_api.delete_user_api', 'DELETE', lambda i, s: (f'/api/users/{NEW_ID_OFFSET + i}', {}), 10),
+    ('bulk_add_users x10', 'user_api.bulk_add_users', 'POST', lambda i, s: ('/api/users/bulk', {
+        'json': [user_json(NEW_ID_OFFSET * 2 + i * 10 + k) for k in range(10)]}), 3),
+]
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def uncovered_routes(app):
+    covered = {(endpoint, method) for _, endpoint, method, _, _ in REQUESTS}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.split('.')[0] not in BENCHMARKED_BLUEPRINTS:
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (rule.endpoint, method) not in covered:
+                missing.append(f'{method} {rule.rule}')
+    return missing
+
+def run_scale(job_count, request_count, response_cache):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'PASSWORD_HASH_WORKERS': 0,
+            'RESPONSE_CACHE_MAX_BYTES': 32 * 1024 * 1024 if response_cache else 0,
+        })
+        started = time.perf_counter()
+        scale = generate(max(job_count // 10, 10), job_count, 10)
+        build_seconds = time.perf_counter() - started
+
+        queries = [0]
+        def count_query(*args):
+            queries[0] += 1
+        event.listen(get_engine(), 'before_cursor_execute', count_query)
+
+        client = app.test_client()
+        client.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+        results = []
+        for name, endpoint, method, build, max_requests in REQUESTS:
+            timings, query_counts, statuses = [], [], {}
+            for i in range(min(request_count, max_requests or request_count)):
+                url, kwargs = build(i, scale)
+                queries[0] = 0
+                start = time.perf_counter()
+                response = client.open(url, method=method, **kwargs)
+                response.get_data()
+                timings.append((time.perf_counter() - start) * 1000)
+                query_counts.append(queries[0])
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            timings.sort()
+            results.append({
+                'name': name,
+                'endpoint': endpoint,
+                'method': method,
+                'requests': len(timings),
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'mean_ms': round(sum(timings) / len(timings), 3),
+                'queries_per_request': round(sum(query_counts) / len(query_counts), 2),
+                'max_queries': max(query_counts),
+                'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            })
+        event.remove(get_engine(), 'before_cursor_execute', count_query)
+        missing = uncovered_routes(app)
+        get_engine().dispose()
+        configure_engine(None)
+    return {'scale': scale, 'build_seconds': round(build_seconds, 2), 'results': results, 'uncovered_routes': missing}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_scale(run):
+    print(f"\n{run['scale']['jobs']} jobs / {run['scale']['users']} users (built in {run['build_seconds']} s)")
+    print(f"{'request':<24}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}  status")
+    for result in run['results']:
+        print(f"{result['name']:<24}{result['requests']:>5}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['queries_per_request']:>9.1f}  {result['status_codes']}")
+    if run['uncovered_routes']:
+        print('not benchmarked:', ', '.join(run['uncovered_routes']))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure per-route latency against generated databases.')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1000, 100000],
+                        help='dataset sizes to run, e.g. --jobs 1000 100000 1000000')
+    parser.add_argument('--requests', type=int, default=50, help='requests per benchmarked route')
+    parser.add_argument('--response-cache', action='store_true', help='leave the response cache enabled')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/endpoints-<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    runs = []
+    for job_count in args.jobs:
+        run = run_scale(job_count, args.requests, args.response_cache)
+        print_scale(run)
+        runs.append(run)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"endpoints-{timestamp:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': timestamp.isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'requests_per_route': args.requests,
+            'response_cache': args.response_cache,
+            'runs': runs,
+        }, f, indent=2)
+    print(f'\nresults written to {output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from models import Base, Session, User, Jobs, Category, association_table, configure_engine, get_engine
+from jobs_api import JOB_FIELDS, get_jobs_with_details, select_job_rows, job_rows_to_dicts
+from serialization import dumps, orjson
+
+def build_database(path, job_count):
+    configure_engine({'DATABASE_URL': f'sqlite:///{path}'})
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [{
+            'id': 1, 'surname': 'Scott', 'name': 'Ridley', 'age': 21, 'position': 'captain',
+            'speciality': 'research engineer', 'address': 'module_1', 'email': 'bench@mars.org',
+            'hashed_password': 'x'
+        }])
+        connection.execute(Category.__table__.insert(), [{'id': i, 'name': f'category {i}'} for i in range(1, 6)])
+        connection.execute(Jobs.__table__.insert(), [{
+            'id': i, 'team_leader': 1, 'job': f'job {i}', 'work_size': i % 40, 'collaborators': '2, 3',
+            'start_date': now + datetime.timedelta(minutes=i), 'end_date': None, 'is_finished': i % 2 == 0
+        } for i in range(1, job_count + 1)])
+        connection.execute(association_table.insert(), [
+            {'job_id': i, 'category_id': c} for i in range(1, job_count + 1) for c in (i % 5 + 1, (i + 2) % 5 + 1)
+        ])
+
+def orm_path():
+    session = Session()
+    jobs = session.scalars(select(Jobs).options(selectinload(Jobs.categories)).order_by(Jobs.id)).all()
+    body = json.dumps({'jobs': get_jobs_with_details(jobs)}).encode()
+    session.close()
+    return body
+
+def projection_path():
+    session = Session()
+    rows = session.execute(select_job_rows(JOB_FIELDS).order_by(Jobs.id)).all()
+    body = dumps({'jobs': job_rows_to_dicts(rows, JOB_FIELDS)})
+    session.close()
+    return body
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the ORM and projection job serializers.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"encoder: {'orjson' if orjson else 'json'}")
+    for job_count in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(os.path.join(tmp, 'bench.db'), job_count)
+            orm_time = best_of(orm_path, args.repeat)
+            projection_time = best_of(projection_path, args.repeat)
+            get_engine().dispose()
+        print(f"{job_count:>8} rows  orm {orm_time * 1000:9.1f} ms  projection {projection_time * 1000:9.1f} ms"
+              f"  speedup {orm_time / projection_time:5.2f}x")
+
+if __name__ == '__main__':
+    main()
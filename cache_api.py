@@ -0,0 +1,8 @@
+from flask import Blueprint, jsonify
+import response_cache
+
+cache_api = Blueprint('cache_api', __name__)
+
+@cache_api.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({'response_cache': response_cache.stats(), 'fragment_cache': response_cache.fragment_stats()})
@@ -0,0 +1,64 @@
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from models import Category
+
+_names_by_id = {}
+_ids_by_name = {}
+_lock = threading.Lock()
+
+def remember(rows):
+    with _lock:
+        for category_id, name in rows:
+            _names_by_id[category_id] = name
+            _ids_by_name[name] = category_id
+
+def invalidate():
+    with _lock:
+        _names_by_id.clear()
+        _ids_by_name.clear()
+
+def names_for_ids(session, ids):
+    ids = set(ids)
+    with _lock:
+        found = {category_id: _names_by_id[category_id] for category_id in ids if category_id in _names_by_id}
+    missing = ids - set(found)
+    if missing:
+        with session.no_autoflush:
+            rows = session.execute(select(Category.id, Category.name).where(Category.id.in_(missing))).all()
+        remember(rows)
+        found.update(rows)
+    return found
+
+def ids_for_names(session, names, create=False):
+    names = set(names)
+    with _lock:
+        found = {name: _ids_by_name[name] for name in names if name in _ids_by_name}
+    missing = names - set(found)
+    if missing:
+        with session.no_autoflush:
+            rows = session.execute(select(Category.name, Category.id).where(Category.name.in_(missing))).all()
+        remember((category_id, name) for name, category_id in rows)
+        found.update(rows)
+        missing -= set(found)
+    if missing and create:
+        with session.no_autoflush:
+            session.execute(Category.__table__.insert(), [{'name': name} for name in sorted(missing)])
+            invalidate()
+            found.update(session.execute(select(Category.name, Category.id).where(Category.name.in_(missing))).all())
+    return found
+
+def attach(session, names_by_id):
+    categories = []
+    for category_id, name in sorted(names_by_id.items()):
+        category = Category(id=category_id, name=name)
+        make_transient_to_detached(category)
+        categories.append(session.merge(category, load=False))
+    return categories
+
+def categories_by_ids(session, ids):
+    return attach(session, names_for_ids(session, ids))
+
+def categories_by_names(session, names):
+    found = ids_for_names(session, names, create=True)
+    return attach(session, {category_id: name for name, category_id in found.items()})
@@ -0,0 +1,83 @@
+import os
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+import metrics
+
+DEFAULT_DATABASE_URL = 'sqlite:///mars_explorer.db'
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+class TimedQueuePool(QueuePool):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.observe('db_pool_checkout_duration_seconds', time.perf_counter() - started)
+
+def parse_echo(value):
+    value = (value or '').strip().lower()
+    if value == 'debug':
+        return 'debug'
+    return value in ('1', 'true', 'yes', 'on')
+
+def config_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    for name in DEFAULT_SQLITE_PRAGMAS:
+        override = environ.get(f'SQLITE_{name.upper()}')
+        if override:
+            pragmas[name] = override
+    return {
+        'DATABASE_URL': environ.get('DATABASE_URL', DEFAULT_DATABASE_URL),
+        'DATABASE_ECHO': parse_echo(environ.get('DATABASE_ECHO')),
+        'DATABASE_POOL_SIZE': int(environ.get('DATABASE_POOL_SIZE', 5)),
+        'DATABASE_MAX_OVERFLOW': int(environ.get('DATABASE_MAX_OVERFLOW', 10)),
+        'DATABASE_POOL_TIMEOUT': int(environ.get('DATABASE_POOL_TIMEOUT', 30)),
+        'DATABASE_POOL_RECYCLE': int(environ.get('DATABASE_POOL_RECYCLE', 3600)),
+        'SQLITE_PRAGMAS': pragmas,
+    }
+
+def apply_sqlite_pragmas(engine, pragmas, in_memory=False):
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if in_memory and name == 'journal_mode':
+                continue
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def make_engine(config=None):
+    settings = config_from_env()
+    settings.update(config or {})
+    url = make_url(settings['DATABASE_URL'])
+    options = {'echo': settings['DATABASE_ECHO']}
+
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    in_memory = is_sqlite and url.database in (None, '', ':memory:')
+    if in_memory:
+        options['poolclass'] = StaticPool
+        options['connect_args'] = {'check_same_thread': False}
+    else:
+        options.update(
+            pool_size=settings['DATABASE_POOL_SIZE'],
+            max_overflow=settings['DATABASE_MAX_OVERFLOW'],
+            pool_timeout=settings['DATABASE_POOL_TIMEOUT'],
+            pool_recycle=settings['DATABASE_POOL_RECYCLE'],
+        )
+        options['poolclass'] = TimedQueuePool
+
+    engine = create_engine(url, **options)
+    if is_sqlite:
+        apply_sqlite_pragmas(engine, settings['SQLITE_PRAGMAS'], in_memory)
+    return engine
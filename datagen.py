@@ -0,0 +1,208 @@
+import argparse
+import datetime
+import random
+import time
+from sqlalchemy import func, select, text
+from models import Base, Jobs, User, configure_engine, get_engine
+from migrations import JOB_CATEGORY_NAMES, upgrade
+import passwords
+
+DEFAULT_PASSWORD = 'password'
+DEFAULT_START_DATE = datetime.datetime(2020, 1, 1)
+CHUNK_SIZE = 100000
+MAX_WORK_SIZE = 60
+LOAD_PRAGMAS = {'synchronous': 'OFF', 'cache_size': -262144, 'temp_store': 'MEMORY'}
+GENERATED_TABLES = ('users', 'jobs', 'categories', 'job_categories', 'job_collaborators',
+                    'departments', 'department_members')
+
+CATEGORY_NAMES = ('Research', 'Construction', 'Maintenance', 'Geology', 'Life support', 'Navigation',
+                  'Communications', 'Agriculture', 'Medicine', 'Logistics', 'Power', 'Robotics')
+SURNAMES = ('Scott', 'Weir', 'Watney', 'Lewis', 'Martinez', 'Johanssen', 'Beck', 'Vogel', 'Kapoor', 'Park',
+            'Ivanova', 'Okafor', 'Tanaka', 'Novak', 'Silva', 'Haddad')
+NAMES = ('Ridley', 'Andy', 'Mark', 'Melissa', 'Rick', 'Beth', 'Chris', 'Alex', 'Venkat', 'Mindy',
+         'Anna', 'Chidi', 'Yuki', 'Petr', 'Lucas', 'Rania')
+POSITIONS = ('captain', 'chief engineer', 'chief researcher', 'middle engineer', 'middle researcher',
+             'junior engineer', 'junior researcher', 'pilot')
+SPECIALITIES = ('research engineer', 'geologist', 'doctor', 'botanist', 'pilot', 'chemist', 'mechanic',
+                'programmer')
+CITIES = ('Houston', 'Moscow', 'Toulouse', 'Tokyo', 'Bangalore', 'Kourou', 'Baikonur', 'Cologne')
+ACTIVITIES = ('deployment of', 'maintenance of', 'inspection of', 'calibration of', 'repair of',
+              'survey of', 'assembly of', 'analysis of')
+OBJECTS = ('residential modules', 'the greenhouse', 'solar arrays', 'the rover', 'water recyclers',
+           'drilling rigs', 'the comms mast', 'oxygen generators', 'sample containers', 'the airlock')
+
+def insert_rows(connection, table, columns, rows):
+    placeholders = ', '.join('?' for _ in columns)
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            connection.exec_driver_sql(statement, batch)
+            batch = []
+    if batch:
+        connection.exec_driver_sql(statement, batch)
+
+def date_strings(start_date, days):
+    return [(start_date + datetime.timedelta(days=day)).strftime('%Y-%m-%d ') for day in range(days)]
+
+def minute_strings():
+    return [f'{minute // 60:02d}:{minute % 60:02d}:00.000000' for minute in range(24 * 60)]
+
+def distinct_ids(random, upper, count):
+    return list(dict.fromkeys(int(random() * upper) + 1 for _ in range(count)))
+
+def user_rows(rng, user_count, hashed_password, created):
+    random = rng.random
+    for user_id in range(1, user_count + 1):
+        yield (user_id, SURNAMES[int(random() * len(SURNAMES))], NAMES[int(random() * len(NAMES))],
+               16 + int(random() * 55), POSITIONS[int(random() * len(POSITIONS))],
+               SPECIALITIES[int(random() * len(SPECIALITIES))], f'module_{int(random() * 20) + 1}',
+               f'user{user_id}@mars.org', CITIES[int(random() * len(CITIES))], hashed_password, created, 0)
+
+def job_rows(rng, job_count, user_count, category_count, start_date, days, category_rows, collaborator_rows):
+    random = rng.random
+    # End dates can run past the last start day by up to MAX_WORK_SIZE hours.
+    dates = date_strings(start_date, days + MAX_WORK_SIZE // 24 + 1)
+    minutes = minute_strings()
+    span = days * 24 * 60
+    descriptions = [f'{activity} {target}' for activity in ACTIVITIES for target in OBJECTS]
+    for job_id in range(1, job_count + 1):
+        collaborators = distinct_ids(random, user_count, 1 + int(random() * 4))
+        for category_id in distinct_ids(random, category_count, int(random() * 4)):
+            category_rows.append((job_id, category_id))
+        for user_id in collaborators:
+            collaborator_rows.append((job_id, user_id))
+        start = int(random() * span)
+        start_string = dates[start // 1440] + minutes[start % 1440]
+        work_size = 1 + int(random() * MAX_WORK_SIZE)
+        is_finished = random() < 0.3
+        if is_finished:
+            end = start + work_size * 60
+            end_string = dates[end // 1440] + minutes[end % 1440]
+        else:
+            end_string = None
+        yield (job_id, int(random() * user_count) + 1, descriptions[int(random() * len(descriptions))], work_size,
+               ', '.join(map(str, collaborators)), start_string, end_string, is_finished, start_string)
+
+def set_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        connection.exec_driver_sql(f'PRAGMA {name}={value}')
+    connection.commit()
+
+def drop_derived_objects(connection):
+    tables = ', '.join(f"'{table}'" for table in GENERATED_TABLES)
+    objects = connection.execute(text(
+        "SELECT type, name, sql FROM sqlite_master "
+        f"WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({tables})"
+    )).all()
+    for object_type, name, _ in objects:
+        connection.execute(text(f"DROP {object_type.upper()} {name}"))
+    return [sql for _, _, sql in objects]
+
+def rebuild_search_index(connection):
+    if not connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'")).first():
+        return
+    connection.execute(text("DELETE FROM jobs_fts"))
+    connection.execute(text(
+        "INSERT INTO jobs_fts (rowid, job, categories) SELECT jobs.id, jobs.job, "
+        + JOB_CATEGORY_NAMES.format(job_id='jobs.id') + " FROM jobs"
+    ))
+
+def generate(users, jobs, departments, seed=0, start_date=DEFAULT_START_DATE, days=5 * 365,
+             password=DEFAULT_PASSWORD, verbose=False):
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    upgrade()
+    with engine.connect() as connection:
+        if connection.execute(select(func.count()).select_from(User)).scalar() or \
+                connection.execute(select(func.count()).select_from(Jobs)).scalar():
+            raise ValueError('Database already has users or jobs; generate into an empty database')
+
+    users = max(users, 1)
+    rng = random.Random(seed)
+    hashed_password = passwords.hash_password(password)
+    created = start_date.strftime('%Y-%m-%d %H:%M:%S.%f')
+    category_count = len(CATEGORY_NAMES)
+    started = time.perf_counter()
+
+    def report(step):
+        if verbose:
+            print(f"{step}: {time.perf_counter() - started:.1f}s")
+
+    with engine.connect() as connection:
+        saved = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in LOAD_PRAGMAS}
+        set_pragmas(connection, LOAD_PRAGMAS)
+        try:
+            with connection.begin():
+                derived = drop_derived_objects(connection)
+
+                insert_rows(connection, 'users', ('id', 'surname', 'name', 'age', 'position', 'speciality', 'address',
+                                                  'email', 'city_from', 'hashed_password', 'modified_date',
+                                                  'credential_version'),
+                            user_rows(rng, users, hashed_password, created))
+                insert_rows(connection, 'categories', ('id', 'name'), enumerate(CATEGORY_NAMES, 1))
+                report('users')
+
+                category_rows, collaborator_rows = [], []
+                rows = job_rows(rng, jobs, users, category_count, start_date, days, category_rows, collaborator_rows)
+                job_columns = ('id', 'team_leader', 'job', 'work_size', 'collaborators', 'start_date', 'end_date',
+                               'is_finished', 'modified_date')
+                while True:
+                    batch = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+                    if not batch:
+                        break
+                    insert_rows(connection, 'jobs', job_columns, batch)
+                    insert_rows(connection, 'job_categories', ('job_id', 'category_id'), category_rows)
+                    insert_rows(connection, 'job_collaborators', ('job_id', 'user_id'), collaborator_rows)
+                    category_rows.clear()
+                    collaborator_rows.clear()
+                report('jobs')
+
+                department_rows, member_rows = [], []
+                for department_id in range(1, departments + 1):
+                    members = rng.sample(range(1, users + 1), min(rng.randint(3, 10), users))
+                    department_rows.append((department_id, f'Department {department_id}', members[0],
+                                            ', '.join(map(str, members)), f'department{department_id}@mars.org'))
+                    member_rows.extend((department_id, user_id) for user_id in members)
+                insert_rows(connection, 'departments', ('id', 'title', 'chief', 'members', 'email'), department_rows)
+                insert_rows(connection, 'department_members', ('department_id', 'user_id'), member_rows)
+
+                for sql in derived:
+                    connection.execute(text(sql))
+                report('indexes')
+                rebuild_search_index(connection)
+                connection.execute(text("UPDATE table_versions SET version = version + 1"))
+                connection.execute(text("ANALYZE"))
+                report('search index')
+        finally:
+            # The connection goes back to the pool; later users must not inherit synchronous=OFF.
+            set_pragmas(connection, saved)
+    return {'users': users, 'jobs': jobs, 'departments': departments, 'categories': category_count}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='generate', description='Fill an empty database with synthetic data.')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=10000)
+    parser.add_argument('--departments', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0, help='random seed; the same seed gives the same data')
+    parser.add_argument('--start-date', type=datetime.datetime.fromisoformat, default=DEFAULT_START_DATE,
+                        help='earliest job start date (ISO format)')
+    parser.add_argument('--days', type=int, default=5 * 365, help='spread of job start dates in days')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='password shared by every generated user')
+    parser.add_argument('--database', help='SQLite file to fill (default: DATABASE_URL)')
+    args = parser.parse_args(argv)
+
+    if args.database:
+        configure_engine({'DATABASE_URL': f'sqlite:///{args.database}'})
+    started = time.perf_counter()
+    try:
+        counts = generate(args.users, args.jobs, args.departments, seed=args.seed, start_date=args.start_date,
+                          days=args.days, password=args.password, verbose=True)
+    except ValueError as e:
+        parser.exit(1, f'{e}\n')
+    print(f"Generated {counts['users']} users, {counts['jobs']} jobs, {counts['departments']} departments "
+          f"in {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
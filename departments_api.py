@@ -0,0 +1,50 @@
+from flask import Blueprint, jsonify
+from sqlalchemy.orm import aliased
+from models import Session, User, Department, department_members
+
+departments_api = Blueprint('departments_api', __name__)
+
+def get_departments_with_details(session, dept_id=None):
+    chief = aliased(User)
+    member = aliased(User)
+    query = session.query(
+        Department.id, Department.title, Department.email,
+        chief.id, chief.surname, chief.name,
+        member.id, member.surname, member.name
+    ).outerjoin(chief, chief.id == Department.chief
+    ).outerjoin(department_members, department_members.c.department_id == Department.id
+    ).outerjoin(member, member.id == department_members.c.user_id)
+    if dept_id is not None:
+        query = query.filter(Department.id == dept_id)
+
+    result = {}
+    for (d_id, title, email, chief_id, chief_surname, chief_name,
+         member_id, member_surname, member_name) in query.order_by(Department.id, member.id):
+        dept = result.get(d_id)
+        if dept is None:
+            dept = result[d_id] = {
+                'id': d_id,
+                'title': title,
+                'email': email,
+                'chief': {'id': chief_id, 'full_name': f"{chief_surname} {chief_name}"} if chief_id else None,
+                'members': []
+            }
+        if member_id is not None:
+            dept['members'].append({'id': member_id, 'full_name': f"{member_surname} {member_name}"})
+    return list(result.values())
+
+@departments_api.route('/api/departments', methods=['GET'])
+def get_departments():
+    session = Session()
+    depts = get_departments_with_details(session)
+    session.close()
+    return jsonify({'departments': depts})
+
+@departments_api.route('/api/departments/<int:dept_id>', methods=['GET'])
+def get_department(dept_id):
+    session = Session()
+    depts = get_departments_with_details(session, dept_id)
+    session.close()
+    if not depts:
+        return jsonify({'error': 'Department not found'}), 404
+    return jsonify({'department': depts[0]})
@@ -0,0 +1,43 @@
+import functools
+from flask import Response, make_response, request
+from sqlalchemy import select
+from models import Session, table_versions
+import response_cache
+
+def current_versions(tables):
+    session = Session()
+    rows = dict(session.execute(
+        select(table_versions.c.table_name, table_versions.c.version)
+        .where(table_versions.c.table_name.in_(tables))
+    ).all())
+    session.close()
+    return [rows.get(table, 0) for table in tables]
+
+def current_etag(tables):
+    return '-'.join(f'{table}.{version}' for table, version in zip(tables, current_versions(tables)))
+
+def conditional(*tables):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = current_etag(tables)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            cached = response_cache.cache.get(key, etag)
+            if cached is not None:
+                response = Response(cached[0], mimetype=cached[1])
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_cache.cache.set(key, etag, tables, response.get_data(), response.mimetype)
+                response.headers['X-Cache'] = 'MISS'
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
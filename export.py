@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from flask import Response, stream_with_context
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+DEFAULT_EXPORT_CHUNK_SIZE = 1000
+
+def csv_value(value):
+    if isinstance(value, list):
+        return ';'.join(str(item) for item in value)
+    return value
+
+def iter_ndjson(chunks):
+    for records in chunks:
+        if records:
+            yield ''.join(json.dumps(record) + '\n' for record in records)
+
+def iter_csv(chunks, fieldnames):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    yield output.getvalue()
+    for records in chunks:
+        output.seek(0)
+        output.truncate()
+        writer.writerows({key: csv_value(value) for key, value in record.items()} for record in records)
+        yield output.getvalue()
+
+def export_response(chunks, output_format, fieldnames, filename):
+    if output_format == 'csv':
+        body = iter_csv(chunks, fieldnames)
+    else:
+        body = iter_ndjson(chunks)
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[output_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{output_format}'}
+    )
@@ -0,0 +1,112 @@
+import contextlib
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+logger = logging.getLogger('mars_explorer.sql')
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+_stats = contextvars.ContextVar('sql_stats', default=None)
+
+def statement_shape(statement):
+    return WHITESPACE.sub(' ', PLACEHOLDER_LIST.sub('(?)', statement)).strip()
+
+def new_stats():
+    return {'queries': 0, 'seconds': 0.0, 'started': None, 'shapes': Counter()}
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats.get()
+    if stats is not None:
+        stats['started'] = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats.get()
+    if stats is None or stats['started'] is None:
+        return
+    stats['seconds'] += time.perf_counter() - stats['started']
+    stats['started'] = None
+    stats['queries'] += 1
+    stats['shapes'][statement_shape(statement)] += 1
+
+def listen():
+    if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+
+def repeated_statements(stats, threshold):
+    return [(shape, count) for shape, count in stats['shapes'].most_common() if count > threshold]
+
+def report(name, stats, threshold, fields=None):
+    fields = dict(fields or {})
+    repeated = repeated_statements(stats, threshold)
+    fields.update(sql_queries=stats['queries'], sql_ms=round(stats['seconds'] * 1000, 2),
+                  n_plus_one=len(repeated))
+    logger.info('%s %s', name, ' '.join(f'{key}={value}' for key, value in fields.items()), extra=fields)
+    for shape, count in repeated:
+        logger.warning('possible N+1 in %s: statement ran %d times (threshold %d): %s', name, count, threshold,
+                       shape, extra={**fields, 'statement': shape, 'repeats': count})
+    return repeated
+
+@contextlib.contextmanager
+def track(name, threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+    listen()
+    stats = new_stats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+        report(name, stats, threshold)
+
+def current_stats():
+    return _stats.get()
+
+def server_timing(stats, total_seconds, repeated):
+    entries = [
+        f'db;dur={stats["seconds"] * 1000:.2f};desc="{stats["queries"]} queries"',
+        f'app;dur={total_seconds * 1000:.2f}',
+    ]
+    if repeated:
+        entries.append(f'n-plus-one;desc="{len(repeated)} repeated statements"')
+    return ', '.join(entries)
+
+def init_app(app):
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    threshold = app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    listen()
+
+    @app.before_request
+    def start_tracking():
+        g.sql_started = time.perf_counter()
+        g.sql_token = _stats.set(new_stats())
+
+    @app.after_request
+    def finish_tracking(response):
+        stats = _stats.get()
+        if stats is None or 'sql_started' not in g:
+            return response
+        total = time.perf_counter() - g.sql_started
+        repeated = report(request.endpoint or request.path, stats, threshold, {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+        })
+        response.headers.add('Server-Timing', server_timing(stats, total, repeated))
+        return response
+
+    @app.teardown_request
+    def stop_tracking(exc):
+        token = g.pop('sql_token', None)
+        if token is not None:
+            _stats.reset(token)
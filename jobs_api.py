@@ -1,41 +1,238 @@
-from flask import Blueprint, jsonify, request
-from main import Session, Jobs, Category, association_table
-from sqlalchemy import and_
+import datetime
+import json
+import re
+from flask import Blueprint, current_app, jsonify, request
+from markupsafe import escape
+from models import Session, User, Jobs, Category, association_table, job_collaborators, parse_id_list
+import category_cache
+from etags import conditional
+import response_cache
+from export import DEFAULT_EXPORT_CHUNK_SIZE, EXPORT_MIMETYPES, export_response
+from serialization import json_response
+from sqlalchemy import String, func, select, text, type_coerce
+from sqlalchemy.exc import SQLAlchemyError
 
 jobs_api = Blueprint('jobs_api', __name__)
 
-def get_jobs_with_details(jobs_list):
+JOB_FIELDS = ('id', 'team_leader', 'job', 'work_size', 'collaborators',
+              'start_date', 'end_date', 'is_finished', 'categories')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_BULK_CHUNK_SIZE = 1000
+MAX_BULK_CHUNK_SIZE = 10000
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/json')
+CATEGORY_SEPARATOR = '\x1f'
+DEFAULT_SEARCH_PAGE_SIZE = 20
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+def get_jobs_with_details(jobs_list, fields=JOB_FIELDS):
     result = []
     for job in jobs_list:
-        job_dict = {
-            'id': job.id,
-            'team_leader': job.team_leader,
-            'job': job.job,
-            'work_size': job.work_size,
-            'collaborators': job.collaborators,
-            'start_date': job.start_date.isoformat() if job.start_date else None,
-            'end_date': job.end_date.isoformat() if job.end_date else None,
-            'is_finished': job.is_finished,
-            'categories': [cat.name for cat in job.categories]
-        }
+        job_dict = {}
+        for field in fields:
+            if field == 'categories':
+                job_dict[field] = [cat.name for cat in job.categories]
+            elif field in ('start_date', 'end_date'):
+                value = getattr(job, field)
+                job_dict[field] = value.isoformat() if value else None
+            else:
+                job_dict[field] = getattr(job, field)
         result.append(job_dict)
     return result
 
+def format_datetime(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.replace(' ', 'T', 1)
+        return value[:-7] if value.endswith('.000000') else value
+    return value.isoformat()
+
+def split_categories(value):
+    return value.split(CATEGORY_SEPARATOR) if value else []
+
+JOB_CONVERTERS = {
+    'start_date': format_datetime,
+    'end_date': format_datetime,
+    'categories': split_categories,
+}
+
+def select_job_rows(fields):
+    columns = []
+    for field in fields:
+        if field == 'categories':
+            columns.append(
+                select(func.group_concat(Category.name, CATEGORY_SEPARATOR))
+                .join(association_table, association_table.c.category_id == Category.id)
+                .where(association_table.c.job_id == Jobs.id)
+                .scalar_subquery()
+                .label('categories')
+            )
+        elif field in ('start_date', 'end_date'):
+            columns.append(type_coerce(getattr(Jobs, field), String).label(field))
+        else:
+            columns.append(getattr(Jobs, field))
+    return select(*columns).select_from(Jobs)
+
+def job_rows_to_dicts(rows, fields):
+    converters = [(field, JOB_CONVERTERS.get(field)) for field in fields]
+    result = []
+    for row in rows:
+        job = {}
+        for (field, convert), value in zip(converters, row):
+            job[field] = convert(value) if convert else value
+        result.append(job)
+    return result
+
+def parse_bool(value):
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'Invalid boolean: {value}')
+
+def apply_jobs_filter(session, query, args):
+    if args.get('q'):
+        query = query.where(Jobs.job.contains(args['q']))
+    if args.get('team_leader'):
+        query = query.where(Jobs.team_leader == int(args['team_leader']))
+    if args.get('is_finished'):
+        query = query.where(Jobs.is_finished == parse_bool(args['is_finished']))
+    if args.get('work_size_min'):
+        query = query.where(Jobs.work_size >= int(args['work_size_min']))
+    if args.get('work_size_max'):
+        query = query.where(Jobs.work_size <= int(args['work_size_max']))
+    if args.get('start_after'):
+        query = query.where(Jobs.start_date >= datetime.datetime.fromisoformat(args['start_after']))
+    if args.get('start_before'):
+        query = query.where(Jobs.start_date < datetime.datetime.fromisoformat(args['start_before']))
+    if args.get('category'):
+        category_id = category_cache.ids_for_names(session, [args['category']]).get(args['category'])
+        query = query.join(association_table, association_table.c.job_id == Jobs.id).where(
+            association_table.c.category_id == category_id
+        )
+    return query
+
+def parse_fields(fields_str):
+    if not fields_str:
+        return JOB_FIELDS
+    fields = tuple(f.strip() for f in fields_str.split(',') if f.strip())
+    unknown = [f for f in fields if f not in JOB_FIELDS]
+    if unknown or not fields:
+        return None
+    return fields
+
 @jobs_api.route('/api/jobs', methods=['GET'])
+@conditional('jobs', 'categories', 'job_categories')
 def get_jobs():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        limit = after = None
+    if limit is None or limit < 1 or limit > MAX_PAGE_SIZE or after < 0:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}, after must be a job id'}), 400
+
+    fields = parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'error': 'Unknown fields requested'}), 400
+
+    query_fields = fields if 'id' in fields else ('id',) + fields
     session = Session()
-    jobs = session.query(Jobs).all()
+    try:
+        query = apply_jobs_filter(session, select_job_rows(query_fields), request.args)
+    except ValueError:
+        session.close()
+        return jsonify({'error': 'Invalid filter value'}), 400
+    if after:
+        query = query.where(Jobs.id > after)
+    rows = session.execute(query.order_by(Jobs.id).limit(limit + 1)).all()
     session.close()
-    return jsonify({'jobs': get_jobs_with_details(jobs)})
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    jobs = job_rows_to_dicts(rows, query_fields)
+    if query_fields is not fields:
+        for job in jobs:
+            del job['id']
+    return json_response({'jobs': jobs, 'next': next_cursor})
+
+def build_search_query(text_query):
+    terms = re.findall(r'\w+', text_query)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+def highlight(snippet):
+    snippet = str(escape(snippet.replace(CATEGORY_SEPARATOR, ', ')))
+    return snippet.replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+@jobs_api.route('/api/jobs/search', methods=['GET'])
+@conditional('jobs', 'categories', 'job_categories')
+def search_jobs():
+    limit = request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or limit > MAX_PAGE_SIZE or offset < 0:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}, offset must not be negative'}), 400
+    match = build_search_query(request.args.get('q', ''))
+    if match is None:
+        return jsonify({'error': 'q is required'}), 400
+
+    session = Session()
+    rows = session.execute(text(
+        "SELECT jobs_fts.rowid AS id, jobs_fts.job, jobs_fts.categories, bm25(jobs_fts) AS score, "
+        "snippet(jobs_fts, -1, :start, :end, '…', 16) AS snippet "
+        "FROM jobs_fts WHERE jobs_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+    ), {'match': match, 'start': SNIPPET_START, 'end': SNIPPET_END, 'limit': limit + 1, 'offset': offset}).all()
+    session.close()
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    results = [{
+        'id': row.id,
+        'job': row.job,
+        'categories': split_categories(row.categories),
+        'score': row.score,
+        'snippet': highlight(row.snippet)
+    } for row in rows]
+    return json_response({'results': results, 'next': next_offset})
+
+def iter_job_chunks(fields, chunk_size):
+    query = select_job_rows(fields).order_by(Jobs.id).execution_options(yield_per=chunk_size)
+    session = Session()
+    try:
+        for rows in session.execute(query).partitions():
+            yield job_rows_to_dicts(rows, fields)
+    finally:
+        session.close()
+
+@jobs_api.route('/api/jobs/export', methods=['GET'])
+def export_jobs():
+    output_format = request.args.get('format', 'ndjson')
+    if output_format not in EXPORT_MIMETYPES:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    fields = parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'error': 'Unknown fields requested'}), 400
+
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+    return export_response(iter_job_chunks(fields, chunk_size), output_format, fields, 'jobs')
 
 @jobs_api.route('/api/jobs/<int:job_id>', methods=['GET'])
+@conditional('jobs', 'categories', 'job_categories')
 def get_job(job_id):
     session = Session()
-    job = session.query(Jobs).filter(Jobs.id == job_id).first()
+    row = session.execute(select_job_rows(JOB_FIELDS).where(Jobs.id == job_id)).first()
     session.close()
-    if not job:
+    if not row:
         return jsonify({'error': 'Job not found'}), 404
-    return jsonify({'job': get_jobs_with_details([job])[0]})
+    return json_response({'job': job_rows_to_dicts([row], JOB_FIELDS)[0]})
 @jobs_api.route('/api/jobs', methods=['POST'])
 def add_job():
     data = request.get_json()
@@ -44,7 +241,6 @@ def add_job():
 
     job_id = data.get('id')
     if job_id is None:
-        session.close()
         return jsonify({'error': 'Id is required'}), 400
 
     session = Session()
@@ -66,7 +262,6 @@ def add_job():
         session.close()
         return jsonify({'error': 'Missing required fields'}), 400
 
-    import datetime
     start_date = datetime.datetime.fromisoformat(start_date_str) if start_date_str else datetime.datetime.now()
     end_date = datetime.datetime.fromisoformat(end_date_str) if end_date_str else None
 
@@ -75,24 +270,151 @@ def add_job():
         team_leader=team_leader_id,
         job=job_description,
         work_size=work_size,
-        collaborators=collaborators_str,
         start_date=start_date,
         end_date=end_date,
         is_finished=is_finished
     )
+    new_job.set_collaborators(session, collaborators_str)
 
-    for name in category_names:
-        category = session.query(Category).filter(Category.name == name).first()
-        if not category:
-            category = Category(name=name)
-            session.add(category)
-        new_job.categories.append(category)
+    new_job.categories = category_cache.categories_by_names(session, category_names)
 
     session.add(new_job)
     session.commit()
+    response_cache.invalidate('jobs')
     session.close()
     return jsonify({'success': 'Job added successfully'}), 201
 
+def iter_lines(stream, read_size=65536):
+    pending = b''
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def parse_bulk_job(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
+    if data.get('id') is None:
+        return None, 'Id is required'
+    if not is_int(data['id']):
+        return None, 'Id must be an integer'
+    if not all([data.get('team_leader'), data.get('job'), data.get('work_size'), data.get('collaborators')]):
+        return None, 'Missing required fields'
+    if not is_int(data['team_leader']) or not is_int(data['work_size']):
+        return None, 'Team leader and work size must be integers'
+    if not isinstance(data['job'], str) or not isinstance(data['collaborators'], str):
+        return None, 'Job and collaborators must be strings'
+    if not isinstance(data.get('is_finished', False), bool):
+        return None, 'is_finished must be a boolean'
+    categories = data.get('categories') or []
+    if not isinstance(categories, list) or not all(isinstance(name, str) for name in categories):
+        return None, 'Categories must be a list of names'
+    try:
+        start_date = datetime.datetime.fromisoformat(data['start_date']) if data.get('start_date') else datetime.datetime.now()
+        end_date = datetime.datetime.fromisoformat(data['end_date']) if data.get('end_date') else None
+    except (TypeError, ValueError):
+        return None, 'Invalid date format'
+    row = {
+        'id': data['id'],
+        'team_leader': data['team_leader'],
+        'job': data['job'],
+        'work_size': data['work_size'],
+        'collaborators': data['collaborators'],
+        'start_date': start_date,
+        'end_date': end_date,
+        'is_finished': data.get('is_finished', False)
+    }
+    return (row, categories), None
+
+def insert_job_batch(session, batch, errors):
+    ids = [row['id'] for _, (row, categories) in batch]
+    existing = set(session.scalars(select(Jobs.id).where(Jobs.id.in_(ids))))
+
+    accepted = []
+    for line_no, (row, categories) in batch:
+        if row['id'] in existing:
+            errors.append({'line': line_no, 'id': row['id'], 'error': 'Id already exists'})
+            continue
+        existing.add(row['id'])
+        accepted.append((line_no, (row, categories)))
+    if not accepted:
+        return 0
+
+    try:
+        names = sorted({name for _, (row, categories) in accepted for name in categories})
+        category_ids = category_cache.ids_for_names(session, names, create=True)
+        collaborator_ids = {row['id']: parse_id_list(row['collaborators']) for _, (row, categories) in accepted}
+        all_user_ids = {user_id for user_ids in collaborator_ids.values() for user_id in user_ids}
+        known_users = set(session.scalars(select(User.id).where(User.id.in_(all_user_ids)))) if all_user_ids else set()
+
+        session.execute(Jobs.__table__.insert(), [row for _, (row, categories) in accepted])
+        category_rows = [{'job_id': row['id'], 'category_id': category_ids[name]}
+                         for _, (row, categories) in accepted for name in dict.fromkeys(categories)]
+        if category_rows:
+            session.execute(association_table.insert(), category_rows)
+        collaborator_rows = [{'job_id': job_id, 'user_id': user_id}
+                             for job_id, user_ids in collaborator_ids.items()
+                             for user_id in user_ids if user_id in known_users]
+        if collaborator_rows:
+            session.execute(job_collaborators.insert(), collaborator_rows)
+        session.commit()
+        response_cache.invalidate('jobs')
+    except SQLAlchemyError as e:
+        session.rollback()
+        category_cache.invalidate()
+        for line_no, (row, _) in accepted:
+            errors.append({'line': line_no, 'id': row['id'], 'error': f'Batch insert failed: {e.__class__.__name__}'})
+        return 0
+    return len(accepted)
+
+@jobs_api.route('/api/jobs/bulk', methods=['POST'])
+def bulk_add_jobs():
+    if request.mimetype not in NDJSON_MIMETYPES:
+        return jsonify({'error': 'Expected application/x-ndjson body'}), 415
+
+    default_chunk_size = current_app.config.get('BULK_CHUNK_SIZE', DEFAULT_BULK_CHUNK_SIZE)
+    chunk_size = request.args.get('chunk_size', default_chunk_size, type=int)
+    if chunk_size < 1 or chunk_size > MAX_BULK_CHUNK_SIZE:
+        return jsonify({'error': f'chunk_size must be between 1 and {MAX_BULK_CHUNK_SIZE}'}), 400
+
+    session = Session()
+    inserted = 0
+    errors = []
+    batch = []
+    try:
+        for line_no, line in enumerate(iter_lines(request.stream), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                errors.append({'line': line_no, 'error': 'Invalid JSON'})
+                continue
+            parsed, error = parse_bulk_job(data)
+            if error:
+                errors.append({'line': line_no, 'error': error})
+                continue
+            batch.append((line_no, parsed))
+            if len(batch) >= chunk_size:
+                inserted += insert_job_batch(session, batch, errors)
+                batch = []
+        if batch:
+            inserted += insert_job_batch(session, batch, errors)
+    finally:
+        session.close()
+
+    errors.sort(key=lambda e: e['line'])
+    return jsonify({'inserted': inserted, 'failed': len(errors), 'errors': errors})
+
 @jobs_api.route('/api/jobs/<int:job_id>', methods=['DELETE'])
 def delete_job_api(job_id):
     session = Session()
@@ -103,6 +425,7 @@ def delete_job_api(job_id):
 
     session.delete(job)
     session.commit()
+    response_cache.invalidate('jobs')
     session.close()
     return jsonify({'success': 'Job deleted successfully'})
 
@@ -125,23 +448,19 @@ def edit_job_api(job_id):
     if 'work_size' in data:
         job.work_size = data['work_size']
     if 'collaborators' in data:
-        job.collaborators = data['collaborators']
+        job.set_collaborators(session, data['collaborators'])
     if 'start_date' in data:
         job.start_date = datetime.datetime.fromisoformat(data['start_date'])
     if 'end_date' in data:
         job.end_date = datetime.datetime.fromisoformat(data['end_date']) if data['end_date'] else None
     if 'is_finished' in data:
         job.is_finished = data['is_finished']
+    job.touch()
 
     if 'categories' in data:
-        job.categories.clear()
-        for name in data['categories']:
-            category = session.query(Category).filter(Category.name == name).first()
-            if not category:
-                category = Category(name=name)
-                session.add(category)
-            job.categories.append(category)
+        job.categories = category_cache.categories_by_names(session, data['categories'])
 
     session.commit()
+    response_cache.invalidate('jobs')
     session.close()
     return jsonify({'success': 'Job updated successfully'})
@@ -0,0 +1,270 @@
+import atexit
+import bisect
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+from flask import g, request
+import instrumentation
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_FLUSH_INTERVAL = 1.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency, by route.'),
+    'db_queries_total': ('counter', 'SQL statements executed while handling requests, by route.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent executing SQL while handling requests, by route.'),
+    'db_pool_checkout_duration_seconds': ('histogram', 'Time spent waiting for a pooled database connection.'),
+    'db_pool_checked_out_connections': ('gauge', 'Pooled connections currently checked out.'),
+    'password_hash_duration_seconds': ('histogram', 'Password hashing and verification time, by operation.'),
+    'cache_hits_total': ('counter', 'Response and fragment cache hits.'),
+    'cache_misses_total': ('counter', 'Response and fragment cache misses.'),
+    'cache_evictions_total': ('counter', 'Response and fragment cache evictions.'),
+    'cache_bytes': ('gauge', 'Bytes held by the response and fragment caches.'),
+}
+
+class Registry:
+    def __init__(self):
+        self.values = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self.values[(name, labels)] = value
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'values': [[name, [list(label) for label in labels], value]
+                           for (name, labels), value in self.values.items()],
+                'histograms': [[name, [list(label) for label in labels], list(histogram)]
+                               for (name, labels), histogram in self.histograms.items()],
+            }
+
+registry = Registry()
+process_started = time.time_ns()
+_directory = None
+_flush_interval = DEFAULT_FLUSH_INTERVAL
+_last_flush = 0.0
+_collectors = []
+
+def _reset_in_child():
+    global registry, process_started, _last_flush
+    registry = Registry()
+    process_started = time.time_ns()
+    _last_flush = 0.0
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_in_child)
+
+def configure(config):
+    global _directory, _flush_interval
+    _directory = config.get('METRICS_DIR') or os.environ.get('METRICS_DIR')
+    if fcntl is None:
+        # Shared snapshots need file locking; without it each process serves only its own metrics.
+        _directory = None
+    _flush_interval = config.get('METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+    if _directory:
+        os.makedirs(_directory, exist_ok=True)
+
+def inc(name, labels=(), amount=1):
+    registry.inc(name, labels, amount)
+
+def observe(name, value, labels=()):
+    registry.observe(name, value, labels)
+
+@contextlib.contextmanager
+def timer(name, labels=()):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - started, labels)
+
+def collector(func):
+    _collectors.append(func)
+    return func
+
+def collect():
+    for func in _collectors:
+        func(registry)
+
+def snapshot_path():
+    return os.path.join(_directory, f'metrics-{os.getpid()}-{process_started}.json')
+
+def flush():
+    global _last_flush
+    if not _directory:
+        return
+    _last_flush = time.monotonic()
+    collect()
+    write_snapshot(snapshot_path(), registry.snapshot())
+
+def maybe_flush():
+    if _directory and time.monotonic() - _last_flush >= _flush_interval:
+        flush()
+
+atexit.register(flush)
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+EXITED_SNAPSHOT = 'metrics-exited.json'
+
+def read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_snapshot(path, snapshot):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def fold_exited(live, exited):
+    # Counters and histograms of exited workers are folded into one file so the
+    # directory does not grow as workers recycle; their gauges are stale and dropped.
+    exited_path = os.path.join(_directory, EXITED_SNAPSHOT)
+    with open(os.path.join(_directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        aggregate = read_snapshot(exited_path) or {'pid': None, 'values': [], 'histograms': [], 'folded': []}
+        folded = set(aggregate['folded'])
+        pending = [(path, snapshot) for path, snapshot in exited if os.path.basename(path) not in folded]
+        if pending:
+            for _, snapshot in pending:
+                snapshot['values'] = [v for v in snapshot['values'] if METRICS[v[0]][0] != 'gauge']
+            values, histograms = merge([aggregate] + [snapshot for _, snapshot in pending])
+            aggregate = {
+                'pid': None,
+                'values': [[name, labels, value] for (name, labels), value in values.items()],
+                'histograms': [[name, labels, histogram] for (name, labels), histogram in histograms.items()],
+                # Recorded before the files are removed, so a crash in between cannot count them twice.
+                'folded': sorted(folded | {os.path.basename(path) for path, _ in pending}),
+            }
+            write_snapshot(exited_path, aggregate)
+        for path, _ in exited:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        remaining = {name for name in aggregate['folded'] if os.path.exists(os.path.join(_directory, name))}
+        if remaining != set(aggregate['folded']):
+            aggregate['folded'] = sorted(remaining)
+            write_snapshot(exited_path, aggregate)
+    return live + [aggregate]
+
+def snapshots():
+    if not _directory:
+        collect()
+        return [registry.snapshot()]
+    flush()
+    live, exited = [], []
+    for path in glob.glob(os.path.join(_directory, 'metrics-*-*.json')):
+        snapshot = read_snapshot(path)
+        if snapshot is None:
+            continue
+        if is_alive(snapshot['pid']):
+            live.append(snapshot)
+        else:
+            exited.append((path, snapshot))
+    return fold_exited(live, exited)
+
+def merge(snapshots):
+    values, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['values']:
+            key = (name, tuple(map(tuple, labels)))
+            values[key] = values.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(histogram))
+            for i, value in enumerate(histogram):
+                total[i] += value
+    return values, histograms
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render(snapshot_list):
+    values, histograms = merge(snapshot_list)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        value_series = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+        histogram_series = sorted((labels, h) for (metric, labels), h in histograms.items() if metric == name)
+        if not value_series and not histogram_series:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in value_series:
+            lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+        for labels, histogram in histogram_series:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram):
+                cumulative += count
+                bucket_labels = labels + (('le', bound),)
+                lines.append(f'{name}_bucket{format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(histogram[-1])}')
+            lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    configure(app.config)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        if 'metrics_started' not in g:
+            return response
+        route = (('blueprint', request.blueprint or ''), ('endpoint', request.endpoint or 'unmatched'))
+        registry.inc('http_requests_total', route + (('method', request.method), ('status', response.status_code)))
+        registry.observe('http_request_duration_seconds', time.perf_counter() - g.metrics_started, route)
+        stats = instrumentation.current_stats()
+        if stats is not None:
+            registry.inc('db_queries_total', route, stats['queries'])
+            registry.inc('db_query_duration_seconds_total', route, stats['seconds'])
+        maybe_flush()
+        return response
@@ -0,0 +1,8 @@
+from flask import Blueprint, Response
+import metrics
+
+metrics_api = Blueprint('metrics_api', __name__)
+
+@metrics_api.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(metrics.snapshots()), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,262 @@
+import argparse
+import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, exists, inspect, text
+from models import (Base, get_engine, User, Jobs, Department, job_collaborators, department_members,
+                    table_versions, VERSIONED_TABLES, parse_id_list)
+
+BATCH_SIZE = 10000
+FILTER_INDEXES = {
+    'ix_jobs_team_leader': ('jobs', 'team_leader'),
+    'ix_jobs_is_finished': ('jobs', 'is_finished'),
+    'ix_jobs_work_size': ('jobs', 'work_size'),
+    'ix_jobs_start_date': ('jobs', 'start_date'),
+    'ix_users_address': ('users', 'address'),
+    'ix_users_age': ('users', 'age'),
+}
+JOB_FILTER_INDEXES = {
+    'ix_jobs_is_finished_work_size': ('jobs', 'is_finished, work_size'),
+    'ix_jobs_is_finished_start_date': ('jobs', 'is_finished, start_date'),
+    'ix_job_categories_category_id': ('job_categories', 'category_id, job_id'),
+}
+
+schema_migrations = Table('schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String, nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def backfill_id_list(connection, association, owner_key, owner_id, id_list):
+    association.create(connection, checkfirst=True)
+    user_ids = set(connection.execute(select(User.id)).scalars())
+
+    inserted = 0
+    last_id = None
+    while True:
+        query = select(owner_id, id_list).where(
+            ~exists().where(association.c[owner_key] == owner_id)
+        ).order_by(owner_id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(owner_id > last_id)
+        batch = connection.execute(query).fetchall()
+        if not batch:
+            break
+
+        rows = []
+        for row_id, value in batch:
+            for user_id in parse_id_list(value):
+                if user_id in user_ids:
+                    rows.append({owner_key: row_id, 'user_id': user_id})
+        if rows:
+            connection.execute(association.insert(), rows)
+            inserted += len(rows)
+        last_id = batch[-1][0]
+    return inserted
+
+def backfill_job_collaborators(connection):
+    return backfill_id_list(connection, job_collaborators, 'job_id', Jobs.id, Jobs.collaborators)
+
+def backfill_department_members(connection):
+    return backfill_id_list(connection, department_members, 'department_id', Department.id, Department.members)
+
+def add_column(connection, table, column, ddl):
+    if column in {c['name'] for c in inspect(connection).get_columns(table)}:
+        return 0
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return 1
+
+def drop_column(connection, table, column):
+    if column not in {c['name'] for c in inspect(connection).get_columns(table)}:
+        return 0
+    connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+    return 1
+
+def drop_triggers(connection, names):
+    for name in names:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    return len(names)
+
+def add_user_credential_version(connection):
+    return add_column(connection, 'users', 'credential_version', 'INTEGER NOT NULL DEFAULT 0')
+
+def drop_user_credential_version(connection):
+    return drop_column(connection, 'users', 'credential_version')
+
+def add_job_modified_date(connection):
+    if not add_column(connection, 'jobs', 'modified_date', 'DATETIME'):
+        return 0
+    connection.execute(text("UPDATE jobs SET modified_date = COALESCE(start_date, CURRENT_TIMESTAMP)"))
+    return 1
+
+def drop_job_modified_date(connection):
+    return drop_column(connection, 'jobs', 'modified_date')
+
+def add_table_version_triggers(connection):
+    table_versions.create(connection, checkfirst=True)
+    created = 0
+    for table in VERSIONED_TABLES:
+        connection.execute(text(
+            "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (:table, 0)"
+        ), {'table': table})
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            trigger = f"{table}_version_{operation.lower()}"
+            if connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"
+            ), {'name': trigger}).first():
+                continue
+            connection.execute(text(
+                f"CREATE TRIGGER {trigger} AFTER {operation} ON {table} BEGIN "
+                f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}'; END"
+            ))
+            created += 1
+    return created
+
+def drop_table_version_triggers(connection):
+    dropped = drop_triggers(connection, [f"{table}_version_{operation}"
+                                         for table in VERSIONED_TABLES for operation in ('insert', 'update', 'delete')])
+    table_versions.drop(connection, checkfirst=True)
+    return dropped
+
+JOB_CATEGORY_NAMES = (
+    "(SELECT group_concat(categories.name, char(31)) FROM job_categories "
+    "JOIN categories ON categories.id = job_categories.category_id "
+    "WHERE job_categories.job_id = {job_id})"
+)
+
+JOB_SEARCH_TRIGGERS = {
+    'jobs_fts_insert': "AFTER INSERT ON jobs BEGIN "
+        "INSERT INTO jobs_fts (rowid, job, categories) VALUES (new.id, new.job, "
+        + JOB_CATEGORY_NAMES.format(job_id='new.id') + "); END",
+    'jobs_fts_update': "AFTER UPDATE OF job ON jobs BEGIN "
+        "UPDATE jobs_fts SET job = new.job WHERE rowid = new.id; END",
+    'jobs_fts_delete': "AFTER DELETE ON jobs BEGIN "
+        "DELETE FROM jobs_fts WHERE rowid = old.id; END",
+    'jobs_fts_category_insert': "AFTER INSERT ON job_categories BEGIN "
+        "UPDATE jobs_fts SET categories = " + JOB_CATEGORY_NAMES.format(job_id='new.job_id')
+        + " WHERE rowid = new.job_id; END",
+    'jobs_fts_category_delete': "AFTER DELETE ON job_categories BEGIN "
+        "UPDATE jobs_fts SET categories = " + JOB_CATEGORY_NAMES.format(job_id='old.job_id')
+        + " WHERE rowid = old.job_id; END",
+}
+
+def add_job_search_index(connection):
+    exists_query = text("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'")
+    if connection.execute(exists_query).first():
+        return 0
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE jobs_fts USING fts5(job, categories, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    for name, body in JOB_SEARCH_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+    result = connection.execute(text(
+        "INSERT INTO jobs_fts (rowid, job, categories) SELECT jobs.id, jobs.job, "
+        + JOB_CATEGORY_NAMES.format(job_id='jobs.id') + " FROM jobs"
+    ))
+    return result.rowcount
+
+def drop_job_search_index(connection):
+    dropped = drop_triggers(connection, list(JOB_SEARCH_TRIGGERS))
+    connection.execute(text("DROP TABLE IF EXISTS jobs_fts"))
+    return dropped
+
+def create_indexes(connection, indexes):
+    existing = {row[0] for row in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    created = 0
+    for name, (table, columns) in indexes.items():
+        if name not in existing:
+            connection.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+            created += 1
+    if created:
+        for table in sorted({table for table, _ in indexes.values()}):
+            connection.execute(text(f"ANALYZE {table}"))
+    return created
+
+def drop_indexes(connection, names):
+    for name in names:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    return len(names)
+
+def add_filter_indexes(connection):
+    return create_indexes(connection, FILTER_INDEXES)
+
+def drop_filter_indexes(connection):
+    return drop_indexes(connection, list(FILTER_INDEXES))
+
+def add_job_filter_indexes(connection):
+    created = create_indexes(connection, JOB_FILTER_INDEXES)
+    return created + drop_indexes(connection, ['ix_jobs_is_finished'])
+
+def drop_job_filter_indexes(connection):
+    drop_indexes(connection, list(JOB_FILTER_INDEXES))
+    return create_indexes(connection, {'ix_jobs_is_finished': FILTER_INDEXES['ix_jobs_is_finished']})
+
+MIGRATIONS = [
+    (1, backfill_job_collaborators, None),
+    (2, backfill_department_members, None),
+    (3, add_user_credential_version, drop_user_credential_version),
+    (4, add_table_version_triggers, drop_table_version_triggers),
+    (5, add_job_modified_date, drop_job_modified_date),
+    (6, add_job_search_index, drop_job_search_index),
+    (7, add_filter_indexes, drop_filter_indexes),
+    (8, add_job_filter_indexes, drop_job_filter_indexes),
+]
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def upgrade(target=None, verbose=False):
+    with get_engine().begin() as connection:
+        applied = applied_versions(connection)
+        for version, migration, _ in MIGRATIONS:
+            if version in applied or (target is not None and version > target):
+                continue
+            result = migration(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=migration.__name__, applied_at=datetime.datetime.now()
+            ))
+            if verbose:
+                print(f"{version:03d} {migration.__name__}: {result}")
+
+def downgrade(target, verbose=False):
+    with get_engine().begin() as connection:
+        applied = applied_versions(connection)
+        for version, migration, revert in reversed(MIGRATIONS):
+            if version <= target or version not in applied:
+                continue
+            result = revert(connection) if revert else 0
+            connection.execute(schema_migrations.delete().where(schema_migrations.c.version == version))
+            if verbose:
+                print(f"{version:03d} {migration.__name__} reverted: {result}")
+
+def status():
+    with get_engine().begin() as connection:
+        applied = applied_versions(connection)
+    return [(version, migration.__name__, version in applied) for version, migration, _ in MIGRATIONS]
+
+def run_migrations(verbose=False):
+    upgrade(verbose=verbose)
+
+def init_db(verbose=False):
+    Base.metadata.create_all(get_engine())
+    run_migrations(verbose)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='migrate', description='Apply or revert schema migrations.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    upgrade_parser = subparsers.add_parser('upgrade', help='apply pending migrations')
+    upgrade_parser.add_argument('--to', type=int, help='stop after this version')
+    downgrade_parser = subparsers.add_parser('downgrade', help='revert applied migrations')
+    downgrade_parser.add_argument('--to', type=int, required=True, help='revert every version above this one')
+    subparsers.add_parser('status', help='list migrations and whether they are applied')
+    args = parser.parse_args(argv)
+
+    if args.command == 'upgrade':
+        upgrade(args.to, verbose=True)
+    elif args.command == 'downgrade':
+        downgrade(args.to, verbose=True)
+    else:
+        for version, name, applied in status():
+            print(f"{version:03d} {name}: {'applied' if applied else 'pending'}")
+
+if __name__ == "__main__":
+    main()
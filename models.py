@@ -0,0 +1,196 @@
+import datetime
+import os
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table, Index
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, relationship, Session as OrmSession
+import metrics
+import passwords
+from database import make_engine
+from flask_login import UserMixin
+
+_engine = None
+_engine_config = None
+
+def configure_engine(config=None):
+    global _engine, _engine_config
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    _engine_config = config
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = make_engine(_engine_config)
+    return _engine
+
+def _dispose_engine_in_child():
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engine_in_child)
+
+@metrics.collector
+def _report_pool(registry):
+    if _engine is not None and hasattr(_engine.pool, 'checkedout'):
+        registry.set('db_pool_checked_out_connections', (), _engine.pool.checkedout())
+
+def __getattr__(name):
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class EngineSession(OrmSession):
+    def get_bind(self, *args, **kwargs):
+        return get_engine()
+
+Base = declarative_base()
+Session = sessionmaker(class_=EngineSession)
+
+ADMIN_USER_ID = 1
+
+association_table = Table('job_categories', Base.metadata,
+    Column('job_id', Integer, ForeignKey('jobs.id'), primary_key=True),
+    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+    Index('ix_job_categories_category_id', 'category_id', 'job_id')
+)
+
+job_collaborators = Table('job_collaborators', Base.metadata,
+    Column('job_id', Integer, ForeignKey('jobs.id'), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Index('ix_job_collaborators_user_id', 'user_id')
+)
+
+department_members = Table('department_members', Base.metadata,
+    Column('department_id', Integer, ForeignKey('departments.id'), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Index('ix_department_members_user_id', 'user_id')
+)
+
+table_versions = Table('table_versions', Base.metadata,
+    Column('table_name', String, primary_key=True),
+    Column('version', Integer, nullable=False, default=0, server_default='0')
+)
+
+VERSIONED_TABLES = ('users', 'jobs', 'categories', 'job_categories')
+
+def parse_id_list(value):
+    ids = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            user_id = int(part)
+        except ValueError:
+            continue
+        if user_id not in ids:
+            ids.append(user_id)
+    return ids
+
+def users_by_ids(session, ids):
+    if not ids:
+        return []
+    return session.query(User).filter(User.id.in_(ids)).all()
+
+class Category(Base):
+    __tablename__ = 'categories'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<Category> {self.name}'
+
+class User(Base, UserMixin):
+    __tablename__ = 'users'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    surname = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    age = Column(Integer, nullable=False, index=True)
+    position = Column(String, nullable=False)
+    speciality = Column(String, nullable=False)
+    address = Column(String, nullable=False, index=True)
+    email = Column(String, unique=True, nullable=False)
+    city_from = Column(String, nullable=True)
+    _hashed_password = Column('hashed_password', String, nullable=False)
+    modified_date = Column(DateTime, default=datetime.datetime.now)
+    credential_version = Column(Integer, nullable=False, default=0, server_default='0')
+    jobs_as_leader = relationship("Jobs", back_populates="team_leader_user")
+    departments_led = relationship("Department", back_populates="chief_user")
+
+    def set_password(self, password):
+        if self._hashed_password:
+            self.bump_credential_version()
+        self._hashed_password = passwords.hash_password(password)
+
+    def check_password(self, password):
+        return passwords.verify_password(self._hashed_password, password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self._hashed_password)
+
+    def rehash_password(self, password):
+        self._hashed_password = passwords.hash_password(password)
+
+    @property
+    def full_name(self):
+        return f"{self.surname} {self.name}"
+
+    @property
+    def is_admin(self):
+        return self.id == ADMIN_USER_ID
+
+    def bump_credential_version(self):
+        self.credential_version = (self.credential_version or 0) + 1
+
+    def touch(self):
+        self.modified_date = datetime.datetime.now()
+
+    def __repr__(self):
+        return f'<Colonist>{self.id} {self.surname} {self.name}'
+
+class Jobs(Base):
+    __tablename__ = 'jobs'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    team_leader = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    job = Column(String, nullable=False)
+    work_size = Column(Integer, nullable=False, index=True)
+    collaborators = Column(Text, nullable=False)
+    start_date = Column(DateTime, default=datetime.datetime.now, index=True)
+    end_date = Column(DateTime)
+    is_finished = Column(Boolean, default=False)
+    modified_date = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+    team_leader_user = relationship("User", back_populates="jobs_as_leader")
+    categories = relationship("Category", secondary=association_table, lazy='subquery', backref="jobs")
+    collaborator_users = relationship("User", secondary=job_collaborators, backref="collaborations")
+
+    __table_args__ = (
+        Index('ix_jobs_is_finished_work_size', 'is_finished', 'work_size'),
+        Index('ix_jobs_is_finished_start_date', 'is_finished', 'start_date'),
+    )
+
+    def set_collaborators(self, session, collaborators_str):
+        self.collaborators = collaborators_str
+        self.collaborator_users = users_by_ids(session, parse_id_list(collaborators_str))
+
+    def touch(self):
+        self.modified_date = datetime.datetime.now()
+
+    def __repr__(self):
+        return f'<Job> {self.job}'
+
+
+class Department(Base):
+    __tablename__ = 'departments'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    title = Column(String, nullable=False)
+    chief = Column(Integer, ForeignKey('users.id'), nullable=False)
+    members = Column(Text, nullable=False) 
+    email = Column(String, unique=True, nullable=False)
+    chief_user = relationship("User", back_populates="departments_led")
+    member_users = relationship("User", secondary=department_members, backref="departments")
+
+    def set_members(self, session, members_str):
+        self.members = members_str
+        self.member_users = users_by_ids(session, parse_id_list(members_str))
@@ -0,0 +1,105 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+import metrics
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_SALT_LENGTH = 16
+DEFAULT_TIMEOUT = 30
+BULK_CHUNKSIZE = 16
+
+class HashingOverloaded(Exception):
+    pass
+
+class HashingPool:
+    def __init__(self, method=DEFAULT_METHOD, salt_length=DEFAULT_SALT_LENGTH,
+                 workers=0, max_pending=None, timeout=DEFAULT_TIMEOUT):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_pending = max_pending or max(workers, 1) * 4
+        self.timeout = timeout
+        self._executor = None
+        self._method_prefix = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            future = self.executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingOverloaded()
+
+    def run_many(self, func, *iterables):
+        if not self.workers:
+            return [func(*args) for args in zip(*iterables)]
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            return list(self.executor().map(func, *iterables, timeout=self.timeout, chunksize=BULK_CHUNKSIZE))
+        except FutureTimeoutError:
+            raise HashingOverloaded()
+        finally:
+            self._slots.release()
+
+    def method_prefix(self):
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        return self._method_prefix
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+pool = HashingPool()
+
+def configure(config):
+    global pool
+    pool.shutdown()
+    workers = config.get('PASSWORD_HASH_WORKERS', 0)
+    pool = HashingPool(
+        method=config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        salt_length=config.get('PASSWORD_HASH_SALT_LENGTH', DEFAULT_SALT_LENGTH),
+        workers=workers,
+        max_pending=config.get('PASSWORD_HASH_QUEUE_DEPTH'),
+        timeout=config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT)
+    )
+
+def hash_password(password):
+    with metrics.timer('password_hash_duration_seconds', (('operation', 'hash'),)):
+        return pool.run(generate_password_hash, password, pool.method, pool.salt_length)
+
+def hash_passwords(password_list):
+    count = len(password_list)
+    with metrics.timer('password_hash_duration_seconds', (('operation', 'hash_many'),)):
+        return pool.run_many(generate_password_hash, password_list, [pool.method] * count, [pool.salt_length] * count)
+
+def verify_password(pwhash, password):
+    with metrics.timer('password_hash_duration_seconds', (('operation', 'verify'),)):
+        return pool.run(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != pool.method_prefix()
+
+def default_workers():
+    return os.cpu_count() or 1
@@ -0,0 +1,111 @@
+import csv
+import io
+from sqlalchemy import func, select
+from models import User, Jobs, job_collaborators, department_members
+
+def rows_to_dicts(rows):
+    return [dict(row._mapping) for row in rows]
+
+def colonists_in_module(session, address='module_1'):
+    rows = session.execute(
+        select(User.id, User.surname, User.name, User.age, User.address)
+        .where(User.address == address)
+        .order_by(User.id)
+    )
+    return rows_to_dicts(rows)
+
+def non_engineers_in_module(session, address='module_1'):
+    rows = session.execute(
+        select(User.id)
+        .where(
+            User.address == address,
+            ~User.speciality.contains('engineer'),
+            ~User.position.contains('engineer')
+        )
+        .order_by(User.id)
+    )
+    return rows_to_dicts(rows)
+
+def minors(session, max_age=17):
+    rows = session.execute(
+        select(User.id, User.surname, User.name, User.age)
+        .where(User.age <= max_age)
+        .order_by(User.age, User.id)
+    )
+    return rows_to_dicts(rows)
+
+def chiefs_and_middles(session):
+    rows = session.execute(
+        select(User.id, User.surname, User.name, User.position)
+        .where(User.position.contains('chief') | User.position.contains('middle'))
+        .order_by(User.id)
+    )
+    return rows_to_dicts(rows)
+
+def small_unfinished_jobs(session, max_work_size=19):
+    rows = session.execute(
+        select(Jobs.id, Jobs.job, Jobs.work_size, Jobs.team_leader)
+        .where(Jobs.work_size <= max_work_size, Jobs.is_finished == False)
+        .order_by(Jobs.id)
+    )
+    return rows_to_dicts(rows)
+
+def largest_team_leaders(session):
+    team_sizes = (
+        select(
+            job_collaborators.c.job_id,
+            func.count().label('team_size'),
+            func.rank().over(order_by=func.count().desc()).label('size_rank')
+        )
+        .group_by(job_collaborators.c.job_id)
+        .subquery()
+    )
+    rows = session.execute(
+        select(Jobs.id.label('job_id'), User.id, User.surname, User.name, team_sizes.c.team_size)
+        .join(team_sizes, team_sizes.c.job_id == Jobs.id)
+        .join(User, User.id == Jobs.team_leader)
+        .where(team_sizes.c.size_rank == 1)
+        .order_by(Jobs.id)
+    )
+    return rows_to_dicts(rows)
+
+def department_member_hours(session, department_id=1, min_hours=26):
+    total_hours = func.sum(Jobs.work_size).label('total_hours')
+    rows = session.execute(
+        select(User.id, User.surname, User.name, total_hours)
+        .select_from(department_members)
+        .join(User, User.id == department_members.c.user_id)
+        .join(job_collaborators, job_collaborators.c.user_id == department_members.c.user_id)
+        .join(Jobs, Jobs.id == job_collaborators.c.job_id)
+        .where(department_members.c.department_id == department_id)
+        .group_by(User.id)
+        .having(total_hours >= min_hours)
+        .order_by(User.id)
+    )
+    return rows_to_dicts(rows)
+
+REPORTS = {
+    'module-colonists': (colonists_in_module, {'address': str}),
+    'module-non-engineers': (non_engineers_in_module, {'address': str}),
+    'minors': (minors, {'max_age': int}),
+    'chiefs-and-middles': (chiefs_and_middles, {}),
+    'small-unfinished-jobs': (small_unfinished_jobs, {'max_work_size': int}),
+    'largest-team-leaders': (largest_team_leaders, {}),
+    'department-member-hours': (department_member_hours, {'department_id': int, 'min_hours': int}),
+}
+
+def run_report(session, name, params=None):
+    report, param_types = REPORTS[name]
+    kwargs = {}
+    for key, value in (params or {}).items():
+        if key in param_types:
+            kwargs[key] = param_types[key](value)
+    return report(session, **kwargs)
+
+def rows_to_csv(rows):
+    output = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return output.getvalue()
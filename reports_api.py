@@ -0,0 +1,28 @@
+from flask import Blueprint, Response, jsonify, request
+from models import Session
+from reports import REPORTS, run_report, rows_to_csv
+
+reports_api = Blueprint('reports_api', __name__)
+
+@reports_api.route('/api/reports', methods=['GET'])
+def get_reports():
+    return jsonify({'reports': sorted(REPORTS)})
+
+@reports_api.route('/api/reports/<name>', methods=['GET'])
+def get_report(name):
+    if name not in REPORTS:
+        return jsonify({'error': 'Report not found'}), 404
+
+    params = request.args.to_dict()
+    output_format = params.pop('format', 'json')
+    session = Session()
+    try:
+        rows = run_report(session, name, params)
+    except ValueError:
+        return jsonify({'error': 'Invalid report parameters'}), 400
+    finally:
+        session.close()
+
+    if output_format == 'csv':
+        return Response(rows_to_csv(rows), mimetype='text/csv')
+    return jsonify({'report': name, 'rows': rows})
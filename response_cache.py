@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+import metrics
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_FRAGMENT_MAX_BYTES = 8 * 1024 * 1024
+
+class ResponseCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, etag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, key, etag, tables, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[2])
+            self._entries[key] = (etag, frozenset(tables), body, mimetype)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[2])
+                self.evictions += 1
+
+    def invalidate(self, *tables):
+        tables = set(tables)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1] & tables]:
+                self.size -= len(self._entries.pop(key)[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+cache = ResponseCache()
+fragments = ResponseCache(DEFAULT_FRAGMENT_MAX_BYTES)
+
+def configure(config):
+    global cache, fragments
+    cache = ResponseCache(config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    fragments = ResponseCache(config.get('FRAGMENT_CACHE_MAX_BYTES', DEFAULT_FRAGMENT_MAX_BYTES))
+
+def invalidate(*tables):
+    cache.invalidate(*tables)
+
+def stats():
+    return cache.stats()
+
+def fragment_stats():
+    return fragments.stats()
+
+@metrics.collector
+def report_metrics(registry):
+    for name, cache_stats in (('response', stats()), ('fragment', fragment_stats())):
+        labels = (('cache', name),)
+        registry.set('cache_hits_total', labels, cache_stats['hits'])
+        registry.set('cache_misses_total', labels, cache_stats['misses'])
+        registry.set('cache_evictions_total', labels, cache_stats['evictions'])
+        registry.set('cache_bytes', labels, cache_stats['bytes'])
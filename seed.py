@@ -0,0 +1,128 @@
+import datetime
+from models import Session, User, Jobs, Department, Category
+
+def seed_database():
+    session = Session()
+    if session.query(User).count() != 0:
+        session.close()
+        return False
+
+    captain = User(
+        id=1, 
+        surname='Scott',
+        name='Ridley',
+        age=21,
+        position='captain',
+        speciality='research engineer',
+        address='module_1',
+        email='scott_chief@mars.org',
+        city_from='London'
+    )
+    captain.set_password('hash123') 
+    session.add(captain)
+
+    colonist1 = User(
+        id=2,
+        surname='Theslave',
+        name='Gael',
+        age=25,
+        position='middle engineer',
+        speciality='biotech engineer',
+        address='module_2',
+        email='111@mars.com',
+        city_from='New York'
+    )
+    colonist1.set_password('hash123')
+
+    colonist2 = User(
+        id=3, 
+        surname='Eater',
+        name='Oldrik',
+        age=30,
+        position='geologist',
+        speciality='geologist',
+        address='module_1',
+        email='222@mars.com',
+        city_from='Moscow'
+    )
+    colonist2.set_password('hash123')
+
+    colonist3 = User(
+        id=4, 
+        surname='Gigant',
+        name='Yourm',
+        age=17,
+        position='assistant',
+        speciality='technician',
+        address='module_1',
+        email='333@mars.com',
+        city_from='Paris'
+    )
+    colonist3.set_password('hash123')
+
+    colonist4 = User(
+        id=5, 
+        surname='Fireceper',
+        name='Cute',
+        age=35,
+        position='chief scientist',
+        speciality='astrobiologist',
+        address='module_3',
+        email='444@mars.com',
+        city_from='Tokyo'
+    )
+    colonist4.set_password('hash123')
+
+    colonist5 = User(
+        id=6, 
+        surname='Blackfire',
+        name='Fride',
+        age=28,
+        position='pilot',
+        speciality='aviation engineer',
+        address='module_1',
+        email='555@mars.com',
+        city_from='Sydney'
+    )
+    colonist5.set_password('hash123')
+
+    session.add_all([colonist1, colonist2, colonist3, colonist4, colonist5])
+    session.commit()
+
+    first_job = None
+    if session.query(Jobs).count() == 0:
+        first_job = Jobs(
+            id=1, 
+            team_leader=captain.id, 
+            job='deployment of residential modules 1 and 2',
+            work_size=15,
+            start_date=datetime.datetime.now(),
+            is_finished=False
+        )
+        first_job.set_collaborators(session, '2, 3')
+        session.add(first_job)
+        session.commit()
+
+    if session.query(Department).count() == 0:
+        geology_dept = Department(
+            title='Geological Survey',
+            chief=colonist2.id,
+            email='geology@mars.org'
+        )
+        geology_dept.set_members(session, '2, 3, 5')
+        session.add(geology_dept)
+        session.commit()
+
+    if session.query(Category).count() == 0:
+        category_construction = Category(name='Construction')
+        category_research = Category(name='Research')
+        category_maintenance = Category(name='Maintenance')
+        session.add_all([category_construction, category_research, category_maintenance])
+        session.commit()
+
+    construction_category = session.query(Category).filter(Category.name == 'Construction').first()
+    if construction_category and first_job:
+        first_job.categories.append(construction_category)
+        session.commit()
+    session.close()
+    return True
@@ -0,0 +1,15 @@
+import json
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def json_response(value, status=200):
+    return Response(dumps(value), status=status, mimetype='application/json')
@@ -0,0 +1,35 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import create_app
+from migrations import init_db
+from models import configure_engine
+from seed import seed_database
+
+class AppTestCase(unittest.TestCase):
+    """Runs a test class in-process against a freshly migrated and seeded temporary database."""
+    CONFIG = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.app = create_app({
+            'DATABASE_URL': f"sqlite:///{os.path.join(cls.tmp.name, 'test.db')}",
+            'PASSWORD_HASH_WORKERS': 0,
+            **cls.CONFIG,
+        })
+        init_db()
+        seed_database()
+
+    @classmethod
+    def tearDownClass(cls):
+        configure_engine(None)
+        cls.tmp.cleanup()
+
+    def login(self, client, email='scott_chief@mars.org', password='hash123'):
+        response = client.post('/login', data={'email': email, 'password': password})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('/login', response.location)
+        return client
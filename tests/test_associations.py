@@ -0,0 +1,115 @@
+import unittest
+import json
+from sqlalchemy import select
+from helpers import AppTestCase
+from models import Session, Jobs, Department, job_collaborators, department_members, get_engine
+import migrations
+
+def linked_users(association, owner_key, owner_id):
+    with get_engine().connect() as connection:
+        return sorted(connection.execute(select(association.c.user_id).where(
+            association.c[owner_key] == owner_id)).scalars())
+
+def collaborators(job_id):
+    return linked_users(job_collaborators, 'job_id', job_id)
+
+def members(dept_id):
+    return linked_users(department_members, 'department_id', dept_id)
+
+def api_member_ids(client, dept_id):
+    return [member['id'] for member in client.get(f'/api/departments/{dept_id}').get_json()['department']['members']]
+
+class TestJobCollaborators(AppTestCase):
+    def add_job(self, job_id, collaborators_str):
+        response = self.app.test_client().post('/api/jobs', json={
+            'id': job_id, 'team_leader': 1, 'job': 'Sync test', 'work_size': 5,
+            'collaborators': collaborators_str})
+        self.assertEqual(response.status_code, 201)
+
+    def test_api_create_and_edit(self):
+        # Duplicates, unknown users and junk are dropped from the association table.
+        self.add_job(700, '3, 2, 3, 999, x')
+        self.assertEqual(collaborators(700), [2, 3])
+
+        client = self.app.test_client()
+        self.assertEqual(client.put('/api/jobs/700', json={'collaborators': '4, 5'}).status_code, 200)
+        self.assertEqual(collaborators(700), [4, 5])
+        self.assertEqual(client.put('/api/jobs/700', json={'work_size': 6}).status_code, 200)
+        self.assertEqual(collaborators(700), [4, 5])
+
+    def test_bulk_create(self):
+        rows = [{'id': 710 + i, 'team_leader': 1, 'job': 'Bulk sync', 'work_size': 5,
+                 'collaborators': value} for i, value in enumerate(['2, 6', '1, 1, 999'])]
+        response = self.app.test_client().post('/api/jobs/bulk', data='\n'.join(map(json.dumps, rows)),
+                                               content_type='application/x-ndjson')
+        self.assertEqual(response.get_json()['inserted'], 2)
+        self.assertEqual(collaborators(710), [2, 6])
+        self.assertEqual(collaborators(711), [1])
+
+    def test_form_create_and_edit(self):
+        client = self.login(self.app.test_client())
+        response = client.post('/add_job', data={'team_leader_id': '1', 'job_description': 'Form sync',
+                                                 'work_size': '5', 'collaborators': '6, 2, 999'})
+        self.assertEqual(response.status_code, 302)
+        session = Session()
+        job_id = session.query(Jobs.id).filter(Jobs.job == 'Form sync').scalar()
+        session.close()
+        self.assertEqual(collaborators(job_id), [2, 6])
+
+        response = client.post(f'/edit_job/{job_id}', data={'job_description': 'Form sync', 'work_size': '5',
+                                                            'collaborators': '5'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(collaborators(job_id), [5])
+
+class TestDepartmentMembers(AppTestCase):
+    def test_form_create_and_edit(self):
+        client = self.login(self.app.test_client())
+        response = client.post('/add_department', data={'title': 'Sync', 'chief_id': '1',
+                                                        'members': '4, 2, 999', 'email': 'sync@mars.org'})
+        self.assertEqual(response.status_code, 302)
+        session = Session()
+        dept_id = session.query(Department.id).filter(Department.email == 'sync@mars.org').scalar()
+        session.close()
+        self.assertEqual(members(dept_id), [2, 4])
+        self.assertEqual(api_member_ids(client, dept_id), [2, 4])
+
+        response = client.post(f'/edit_department/{dept_id}', data={'title': 'Sync', 'chief_id': '1',
+                                                                    'members': '3', 'email': 'sync@mars.org'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(members(dept_id), [3])
+        self.assertEqual(api_member_ids(client, dept_id), [3])
+
+class TestAssociationBackfill(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Rows written without set_collaborators/set_members, as before the association tables existed.
+        session = Session()
+        session.add(Jobs(id=800, team_leader=1, job='Legacy', work_size=1, collaborators='2, 3, 2, 999, x'))
+        session.add(Jobs(id=801, team_leader=1, job='Legacy', work_size=1, collaborators=''))
+        session.add(Department(id=800, title='Legacy', chief=1, members='5, 6, 42', email='legacy@mars.org'))
+        session.commit()
+        session.close()
+
+    def test_job_collaborators_backfill(self):
+        before = collaborators(1)
+        self.assertTrue(before)
+        with get_engine().begin() as connection:
+            self.assertEqual(migrations.backfill_job_collaborators(connection), 2)
+            self.assertEqual(migrations.backfill_job_collaborators(connection), 0)
+        self.assertEqual(collaborators(800), [2, 3])
+        self.assertEqual(collaborators(801), [])
+        self.assertEqual(collaborators(1), before)
+
+    def test_department_members_backfill(self):
+        before = members(1)
+        self.assertTrue(before)
+        with get_engine().begin() as connection:
+            self.assertEqual(migrations.backfill_department_members(connection), 2)
+            self.assertEqual(migrations.backfill_department_members(connection), 0)
+        self.assertEqual(members(800), [5, 6])
+        self.assertEqual(members(1), before)
+        self.assertEqual(api_member_ids(self.app.test_client(), 800), [5, 6])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import time
+import unittest
+from unittest import mock
+from flask_login import current_user, login_required
+from sqlalchemy import event
+from helpers import AppTestCase
+from models import Session, User, get_engine
+import auth
+
+class TestAuth(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        @cls.app.route('/_test/whoami')
+        @login_required
+        def whoami():
+            return current_user.name
+
+    def create_user(self, user_id):
+        response = self.app.test_client().post('/api/users', json={
+            'id': user_id, 'surname': 'Auth', 'name': f'User{user_id}', 'age': 30, 'position': 'p',
+            'speciality': 's', 'address': 'module_1', 'email': f'auth{user_id}@example.com',
+            'password': 'authpassword'})
+        self.assertEqual(response.status_code, 201)
+        return self.login(self.app.test_client(), f'auth{user_id}@example.com', 'authpassword')
+
+    def assertLoggedIn(self, client, name):
+        response = client.get('/_test/whoami')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), name)
+
+    def assertLoggedOut(self, client):
+        response = client.get('/_test/whoami')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response.location)
+
+    def statements(self, func):
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(get_engine(), 'before_cursor_execute', record)
+        try:
+            func()
+        finally:
+            event.remove(get_engine(), 'before_cursor_execute', record)
+        return statements
+
+    def after_ttl(self):
+        later = time.monotonic() + self.app.config['AUTH_VERSION_TTL'] + 1
+        return mock.patch('auth.time.monotonic', return_value=later)
+
+    def test_payload_fast_path_runs_no_queries(self):
+        client = self.create_user(8001)
+        self.assertLoggedIn(client, 'User8001')
+        self.assertEqual(self.statements(lambda: self.assertLoggedIn(client, 'User8001')), [])
+
+    def test_writes_to_other_users_keep_the_cache(self):
+        client = self.create_user(8006)
+        self.assertLoggedIn(client, 'User8006')
+        self.create_user(8007)
+        self.assertEqual(self.app.test_client().put('/api/users/8007', json={'name': 'Other'}).status_code, 200)
+        self.assertEqual(self.statements(lambda: self.assertLoggedIn(client, 'User8006')), [])
+
+    def test_deleted_user_is_logged_out(self):
+        client = self.create_user(8002)
+        self.assertLoggedIn(client, 'User8002')
+        self.assertEqual(self.app.test_client().delete('/api/users/8002').status_code, 200)
+        self.assertLoggedOut(client)
+        self.assertLoggedOut(client)
+
+    def test_password_change_logs_out_existing_sessions(self):
+        client = self.create_user(8003)
+        self.assertLoggedIn(client, 'User8003')
+        response = self.app.test_client().put('/api/users/8003', json={'password': 'newpassword'})
+        self.assertEqual(response.status_code, 200)
+        self.assertLoggedOut(client)
+        self.assertLoggedOut(client)
+        self.assertLoggedIn(self.login(self.app.test_client(), 'auth8003@example.com', 'newpassword'), 'User8003')
+
+    def test_password_change_in_another_process_logs_out(self):
+        client = self.create_user(8004)
+        self.assertLoggedIn(client, 'User8004')
+        # Change the password without going through this process's auth cache, as another worker would.
+        session = Session()
+        user = session.get(User, 8004)
+        user.set_password('otherworker')
+        session.commit()
+        session.close()
+        # This process trusts its verified payload until the TTL runs out.
+        self.assertLoggedIn(client, 'User8004')
+        with self.after_ttl():
+            self.assertLoggedOut(client)
+
+    def test_profile_edit_refreshes_session(self):
+        client = self.create_user(8005)
+        self.assertLoggedIn(client, 'User8005')
+        response = self.app.test_client().put('/api/users/8005', json={'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertLoggedIn(client, 'Renamed')
+
+    def test_new_session_after_remote_password_change(self):
+        self.assertLoggedIn(self.create_user(8008), 'User8008')
+        session = Session()
+        session.get(User, 8008).set_password('otherworker')
+        session.commit()
+        session.close()
+        # The process still holds the old verified version; the newer session must not be revoked.
+        client = self.login(self.app.test_client(), 'auth8008@example.com', 'otherworker')
+        self.assertLoggedIn(client, 'User8008')
+
+    def test_without_payload_loader_every_request_loads_the_user(self):
+        client = self.create_user(8009)
+        self.app.config['AUTH_PAYLOAD_LOADER'] = False
+        try:
+            with mock.patch('auth.current_payload', side_effect=AssertionError('payload cache used')):
+                self.assertLoggedIn(client, 'User8009')
+                session = Session()
+                session.get(User, 8009).set_password('otherworker')
+                session.commit()
+                session.close()
+                self.assertLoggedOut(client)
+        finally:
+            self.app.config['AUTH_PAYLOAD_LOADER'] = True
+
+if __name__ == '__main__':
+    unittest.main()
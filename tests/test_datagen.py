@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import DEFAULT_SQLITE_PRAGMAS
+from models import configure_engine, get_engine
+import datagen
+
+DUMPED_TABLES = {
+    'users': 'id, surname, name, age, position, speciality, address, email, city_from, modified_date',
+    'jobs': '*',
+    'categories': '*',
+    'job_categories': '*',
+    'job_collaborators': '*',
+    'departments': '*',
+    'department_members': '*',
+}
+
+class TestDatagen(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        configure_engine(None)
+        self.tmp.cleanup()
+
+    def generate(self, name, seed):
+        configure_engine({'DATABASE_URL': f"sqlite:///{os.path.join(self.tmp.name, name)}"})
+        datagen.generate(users=40, jobs=300, departments=5, seed=seed)
+        with get_engine().connect() as connection:
+            return {table: connection.exec_driver_sql(f'SELECT {columns} FROM {table} ORDER BY 1, 2').all()
+                    for table, columns in DUMPED_TABLES.items()}
+
+    def test_same_seed_produces_identical_rows(self):
+        first = self.generate('first.db', seed=7)
+        second = self.generate('second.db', seed=7)
+        self.assertEqual(len(first['jobs']), 300)
+        self.assertTrue(first['job_collaborators'])
+        self.assertEqual(first, second)
+        self.assertNotEqual(first['jobs'], self.generate('other.db', seed=8)['jobs'])
+
+    def test_load_pragmas_are_restored(self):
+        self.generate('pragmas.db', seed=0)
+        with get_engine().connect() as connection:
+            synchronous = connection.exec_driver_sql('PRAGMA synchronous').scalar()
+            cache_size = connection.exec_driver_sql('PRAGMA cache_size').scalar()
+        self.assertEqual(synchronous, 1)  # NORMAL
+        self.assertEqual(cache_size, DEFAULT_SQLITE_PRAGMAS['cache_size'])
+
+    def test_refuses_non_empty_database(self):
+        self.generate('full.db', seed=0)
+        with self.assertRaises(ValueError):
+            datagen.generate(users=1, jobs=1, departments=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import requests
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_URL = 'http://127.0.0.1:5000'
+
+class TestDepartmentsAPI(unittest.TestCase):
+    def test_get_all_departments(self):
+        response = requests.get(f'{BASE_URL}/api/departments')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('departments', data)
+
+    def test_get_single_department_valid(self):
+        response = requests.get(f'{BASE_URL}/api/departments/1')
+        self.assertEqual(response.status_code, 200)
+        dept = response.json().get('department')
+        self.assertIn('full_name', dept['chief'])
+        for member in dept['members']:
+            self.assertIn('id', member)
+            self.assertIn('full_name', member)
+
+    def test_get_single_department_invalid_id(self):
+        response = requests.get(f'{BASE_URL}/api/departments/999999')
+        self.assertEqual(response.status_code, 404)
+        data = response.json()
+        self.assertEqual(data.get('error'), 'Department not found')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import json
+import re
+from helpers import AppTestCase
+import response_cache
+
+BOARD_JOBS = [{'id': 500 + i, 'team_leader': 1 if i % 2 else 2, 'job': f'Board job {i}', 'work_size': 10 + i,
+               'collaborators': '2, 3', 'is_finished': i % 3 == 0, 'categories': ['Research']} for i in range(7)]
+ROW_IDS = re.compile(r'<tr>\s*<td>(\d+)</td>')
+
+class TestJobBoard(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        response = cls.app.test_client().post('/api/jobs/bulk', data='\n'.join(map(json.dumps, BOARD_JOBS)),
+                                              content_type='application/x-ndjson')
+        assert response.get_json()['inserted'] == len(BOARD_JOBS)
+
+    def board(self, client=None, **args):
+        response = (client or self.app.test_client()).get('/', query_string=dict({'q': 'Board job'}, **args))
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        return [int(job_id) for job_id in ROW_IDS.findall(html)], html
+
+    def test_pagination(self):
+        first, html = self.board(per_page=3)
+        self.assertEqual(first, [500, 501, 502])
+        self.assertIn('page=2', html)
+        self.assertRegex(html, r'page-item disabled">\s*<a class="page-link" href="[^"]*">Previous')
+
+        last, html = self.board(per_page=3, page=3)
+        self.assertEqual(last, [506])
+        self.assertRegex(html, r'page-item disabled">\s*<a class="page-link" href="[^"]*">Next')
+
+        self.assertEqual(self.board(per_page=3, page=4)[0], [])
+
+    def test_filters(self):
+        self.assertEqual(self.board(team_leader='1')[0], [501, 503, 505])
+        self.assertEqual(self.board(is_finished='yes')[0], [500, 503, 506])
+        self.assertEqual(self.board(is_finished='no', team_leader='2')[0], [502, 504])
+        self.assertEqual(self.board(q='Board job 4')[0], [504])
+
+    def test_filters_are_kept_in_page_links(self):
+        _, html = self.board(per_page=1, team_leader='1')
+        next_link = re.search(r'href="([^"]*page=2[^"]*)"', html).group(1)
+        self.assertIn('team_leader=1', next_link)
+        self.assertIn('q=Board+job', next_link)
+
+    def test_invalid_filter_falls_back_to_unfiltered_board(self):
+        ids, html = self.board(team_leader='abc')
+        self.assertIn('Invalid filter value.', html)
+        self.assertTrue(ids)
+
+    def test_cached_row_changes_after_edit(self):
+        client = self.login(self.app.test_client())
+        self.board(client, q='Board job 2')
+        hits = response_cache.fragment_stats()['hits']
+        self.assertIn('Board job 2<', self.board(client, q='Board job 2')[1])
+        self.assertEqual(response_cache.fragment_stats()['hits'], hits + 1)
+
+        response = client.post('/edit_job/502', data={'job_description': 'Board job 2 edited', 'work_size': '40',
+                                                      'collaborators': '2', 'categories': []})
+        self.assertEqual(response.status_code, 302)
+        ids, html = self.board(client, q='Board job 2')
+        self.assertEqual(ids, [502])
+        self.assertIn('Board job 2 edited', html)
+        self.assertIn('<td>40</td>', html)
+
+if __name__ == '__main__':
+    unittest.main()
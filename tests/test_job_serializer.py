@@ -0,0 +1,69 @@
+import unittest
+import json
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from helpers import AppTestCase
+from models import Session, Jobs
+from jobs_api import JOB_FIELDS, get_jobs_with_details, select_job_rows, job_rows_to_dicts
+from serialization import dumps
+
+SERIALIZER_JOBS = [
+    {'id': 600, 'team_leader': 1, 'job': 'All categories', 'work_size': 10, 'collaborators': '2, 3, 4',
+     'start_date': '2024-03-01T08:30:00.123456', 'end_date': '2024-03-02T09:00:00', 'is_finished': True,
+     'categories': ['Research', 'Construction', 'Maintenance']},
+    {'id': 601, 'team_leader': 2, 'job': 'Two categories', 'work_size': 20, 'collaborators': '5',
+     'start_date': '2024-03-01T08:30:00', 'categories': ['Maintenance', 'Research']},
+    {'id': 602, 'team_leader': 3, 'job': 'No categories', 'work_size': 30, 'collaborators': '1, 6, 999, x',
+     'categories': []},
+]
+
+def normalized(jobs):
+    jobs = json.loads(jobs)['jobs']
+    for job in jobs:
+        if 'categories' in job:
+            job['categories'] = sorted(job['categories'])
+    return jobs
+
+class TestJobSerializer(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        client = cls.app.test_client()
+        for job in SERIALIZER_JOBS:
+            assert client.post('/api/jobs', json=job).status_code == 201
+
+    def orm_jobs(self, fields):
+        session = Session()
+        jobs = session.scalars(select(Jobs).options(selectinload(Jobs.categories)).order_by(Jobs.id)).all()
+        body = json.dumps({'jobs': get_jobs_with_details(jobs, fields)})
+        session.close()
+        return normalized(body)
+
+    def projected_jobs(self, fields):
+        session = Session()
+        rows = session.execute(select_job_rows(fields).order_by(Jobs.id)).all()
+        body = dumps({'jobs': job_rows_to_dicts(rows, fields)})
+        session.close()
+        return normalized(body)
+
+    def test_projection_matches_orm_serializer(self):
+        orm_jobs = self.orm_jobs(JOB_FIELDS)
+        self.assertEqual(self.projected_jobs(JOB_FIELDS), orm_jobs)
+        by_id = {job['id']: job for job in orm_jobs}
+        self.assertEqual(by_id[600]['categories'], ['Construction', 'Maintenance', 'Research'])
+        self.assertEqual(by_id[600]['collaborators'], '2, 3, 4')
+        self.assertEqual(by_id[602]['categories'], [])
+
+    def test_projection_matches_orm_serializer_for_field_subsets(self):
+        for fields in [('id', 'collaborators'), ('categories', 'id'), ('end_date', 'start_date', 'is_finished')]:
+            with self.subTest(fields=fields):
+                self.assertEqual(self.projected_jobs(fields), self.orm_jobs(fields))
+
+    def test_api_serves_projected_jobs(self):
+        job = self.app.test_client().get('/api/jobs/600').get_json()['job']
+        self.assertEqual(sorted(job['categories']), ['Construction', 'Maintenance', 'Research'])
+        self.assertEqual(job['collaborators'], '2, 3, 4')
+        self.assertEqual(job['start_date'], '2024-03-01T08:30:00.123456')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,8 @@ from main import engine, Base, Session
 from main import User, Jobs, Category, association_table
 
 BASE_URL = 'http://127.0.0.1:5000'
+JOB_EXPORT_FIELDS = ('id', 'team_leader', 'job', 'work_size', 'collaborators',
+                     'start_date', 'end_date', 'is_finished', 'categories')
 class TestJobsAPI(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -19,6 +21,130 @@ class TestJobsAPI(unittest.TestCase):
         data = response.json()
         self.assertIn('jobs', data)
 
+    def test_get_jobs_paginated(self):
+        response = requests.get(f'{BASE_URL}/api/jobs?limit=1')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['jobs']), 1)
+        self.assertIsNotNone(data['next'])
+
+        next_response = requests.get(f'{BASE_URL}/api/jobs?limit=1&after={data["next"]}')
+        self.assertEqual(next_response.status_code, 200)
+        next_jobs = next_response.json()['jobs']
+        self.assertTrue(all(job['id'] > data['next'] for job in next_jobs))
+
+    def test_get_jobs_not_modified(self):
+        response = requests.get(f'{BASE_URL}/api/jobs')
+        etag = response.headers['ETag']
+        cached = requests.get(f'{BASE_URL}/api/jobs', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached.headers['ETag'], etag)
+
+    def test_get_jobs_not_modified_weak_etag(self):
+        etag = requests.get(f'{BASE_URL}/api/jobs').headers['ETag']
+        cached = requests.get(f'{BASE_URL}/api/jobs', headers={'If-None-Match': f'"other", W/{etag}'})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_get_job_etag_changes_on_write(self):
+        etag = requests.get(f'{BASE_URL}/api/jobs/1').headers['ETag']
+        job_data = {"id": 993, "team_leader": 1, "job": "ETag job", "work_size": 1, "collaborators": "2"}
+        requests.post(f'{BASE_URL}/api/jobs', json=job_data)
+        response = requests.get(f'{BASE_URL}/api/jobs/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        requests.delete(f'{BASE_URL}/api/jobs/993')
+
+    def test_get_jobs_response_cache(self):
+        url = f'{BASE_URL}/api/jobs?fields=id,job&limit=3'
+        requests.get(url)
+        before = requests.get(f'{BASE_URL}/api/cache/stats').json()['response_cache']
+        response = requests.get(url)
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        after = requests.get(f'{BASE_URL}/api/cache/stats').json()['response_cache']
+        self.assertEqual(after['hits'], before['hits'] + 1)
+
+        job_data = {"id": 992, "team_leader": 1, "job": "Cache job", "work_size": 1, "collaborators": "2"}
+        requests.post(f'{BASE_URL}/api/jobs', json=job_data)
+        self.assertEqual(requests.get(url).headers['X-Cache'], 'MISS')
+        requests.delete(f'{BASE_URL}/api/jobs/992')
+
+    def test_search_jobs(self):
+        job_data = {"id": 991, "team_leader": 1, "job": "Calibrate the seismograph array", "work_size": 4,
+                    "collaborators": "2", "categories": ["Geology survey"]}
+        requests.post(f'{BASE_URL}/api/jobs', json=job_data)
+
+        response = requests.get(f'{BASE_URL}/api/jobs/search?q=seismo')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[0]['id'], 991)
+        self.assertIn('<mark>seismograph</mark>', results[0]['snippet'])
+
+        results = requests.get(f'{BASE_URL}/api/jobs/search?q=geology').json()['results']
+        self.assertEqual([result['id'] for result in results], [991])
+        self.assertEqual(results[0]['categories'], ['Geology survey'])
+
+        requests.put(f'{BASE_URL}/api/jobs/991', json={"job": "Repair the rover"})
+        results = requests.get(f'{BASE_URL}/api/jobs/search?q=seismograph').json()['results']
+        self.assertEqual(results, [])
+        requests.delete(f'{BASE_URL}/api/jobs/991')
+
+    def test_search_jobs_requires_query(self):
+        response = requests.get(f'{BASE_URL}/api/jobs/search?q=%22%2A')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_jobs_filtered(self):
+        job_data = {"id": 990, "team_leader": 2, "job": "Filtered job", "work_size": 7, "collaborators": "3",
+                    "start_date": "2031-05-01T08:00:00", "categories": ["Filter category"]}
+        requests.post(f'{BASE_URL}/api/jobs', json=job_data)
+
+        response = requests.get(f'{BASE_URL}/api/jobs?category=Filter category&team_leader=2'
+                                f'&is_finished=false&work_size_min=5&work_size_max=10'
+                                f'&start_after=2031-05-01&start_before=2031-05-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.json()['jobs']], [990])
+
+        response = requests.get(f'{BASE_URL}/api/jobs?category=Filter category&work_size_max=6')
+        self.assertEqual(response.json()['jobs'], [])
+        requests.delete(f'{BASE_URL}/api/jobs/990')
+
+    def test_get_jobs_invalid_filter(self):
+        response = requests.get(f'{BASE_URL}/api/jobs?start_after=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_jobs_invalid_limit(self):
+        for query in ('limit=0', 'limit=abc', 'limit=', 'after=abc', 'after=-1'):
+            response = requests.get(f'{BASE_URL}/api/jobs?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_get_jobs_sparse_fields(self):
+        response = requests.get(f'{BASE_URL}/api/jobs?fields=id,job,is_finished')
+        self.assertEqual(response.status_code, 200)
+        for job in response.json()['jobs']:
+            self.assertEqual(set(job), {'id', 'job', 'is_finished'})
+
+    def test_get_jobs_unknown_field(self):
+        response = requests.get(f'{BASE_URL}/api/jobs?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_jobs_ndjson(self):
+        response = requests.get(f'{BASE_URL}/api/jobs/export', stream=True)
+        self.assertEqual(response.status_code, 200)
+        jobs = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertTrue(jobs)
+        self.assertEqual(set(jobs[0]), set(JOB_EXPORT_FIELDS))
+        self.assertEqual([job['id'] for job in jobs], sorted(job['id'] for job in jobs))
+
+    def test_export_jobs_csv_fields(self):
+        response = requests.get(f'{BASE_URL}/api/jobs/export?format=csv&fields=id,job,categories')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response.text.splitlines()[0], 'id,job,categories')
+
+    def test_export_jobs_unknown_field(self):
+        response = requests.get(f'{BASE_URL}/api/jobs/export?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+
     def test_get_single_job_valid(self):
         response = requests.get(f'{BASE_URL}/api/jobs/1')
         self.assertEqual(response.status_code, 200)
@@ -50,6 +176,26 @@ class TestJobsAPI(unittest.TestCase):
         data = response.json()
         self.assertEqual(data.get('success'), 'Job added successfully')
 
+    def test_add_job_new_and_existing_categories(self):
+        job_data = {
+            "id": 994,
+            "team_leader": 1,
+            "job": "Job with new category",
+            "work_size": 3,
+            "collaborators": "2",
+            "categories": ["Research", "Cached category", "Cached category"]
+        }
+        response = requests.post(f'{BASE_URL}/api/jobs', json=job_data)
+        self.assertEqual(response.status_code, 201)
+        job = requests.get(f'{BASE_URL}/api/jobs/994').json()['job']
+        self.assertEqual(sorted(job['categories']), ['Cached category', 'Research'])
+
+        response = requests.put(f'{BASE_URL}/api/jobs/994', json={"categories": ["Cached category"]})
+        self.assertEqual(response.status_code, 200)
+        job = requests.get(f'{BASE_URL}/api/jobs/994').json()['job']
+        self.assertEqual(job['categories'], ['Cached category'])
+        requests.delete(f'{BASE_URL}/api/jobs/994')
+
     def test_add_job_duplicate_id(self):
         job_data = {
             "id": 998,
@@ -88,6 +234,55 @@ class TestJobsAPI(unittest.TestCase):
         response = requests.post(f'{BASE_URL}/api/jobs', data='not json')
         self.assertEqual(response.status_code, 415)
 
+    def test_bulk_add_jobs(self):
+        lines = [
+            {"id": 5001, "team_leader": 1, "job": "Bulk job 1", "work_size": 3,
+             "collaborators": "2, 3", "categories": ["Research", "Bulk import"]},
+            {"id": 5002, "team_leader": 1, "job": "Bulk job 2", "work_size": 4, "collaborators": "2"},
+            {"id": 5001, "team_leader": 1, "job": "Duplicate bulk job", "work_size": 5, "collaborators": "3"},
+            {"id": 5003, "team_leader": 1},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+        response = requests.post(f'{BASE_URL}/api/jobs/bulk?chunk_size=2', data=body,
+                                 headers={'Content-Type': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['inserted'], 2)
+        self.assertEqual([error['line'] for error in data['errors']], [3, 4, 5])
+
+        job = requests.get(f'{BASE_URL}/api/jobs/5001').json()['job']
+        self.assertEqual(job['collaborators'], '2, 3')
+        self.assertEqual(sorted(job['categories']), ['Bulk import', 'Research'])
+        requests.delete(f'{BASE_URL}/api/jobs/5001')
+        requests.delete(f'{BASE_URL}/api/jobs/5002')
+
+    def test_bulk_add_jobs_mistyped_rows(self):
+        valid = {"team_leader": 1, "job": "Typed bulk job", "work_size": 3, "collaborators": "2"}
+        lines = [
+            {**valid, "id": 5011, "collaborators": [2, 3]},
+            {**valid, "id": 5012, "work_size": "abc"},
+            {**valid, "id": 5013, "is_finished": "false"},
+            {**valid, "id": 5014, "team_leader": "1"},
+            {**valid, "id": 5015, "job": ["x"]},
+            {**valid, "id": True},
+            {**valid, "id": 5016, "is_finished": True},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines)
+        response = requests.post(f'{BASE_URL}/api/jobs/bulk', data=body,
+                                 headers={'Content-Type': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['inserted'], 1)
+        self.assertEqual([error['line'] for error in data['errors']], [1, 2, 3, 4, 5, 6])
+
+        self.assertEqual(requests.get(f'{BASE_URL}/api/jobs/5011').status_code, 404)
+        self.assertIs(requests.get(f'{BASE_URL}/api/jobs/5016').json()['job']['is_finished'], True)
+        requests.delete(f'{BASE_URL}/api/jobs/5016')
+
+    def test_bulk_add_jobs_wrong_content_type(self):
+        response = requests.post(f'{BASE_URL}/api/jobs/bulk', data='{}', headers={'Content-Type': 'text/plain'})
+        self.assertEqual(response.status_code, 415)
+
     def test_delete_job_valid(self):
         new_job_data = {
             "id": 996,
@@ -0,0 +1,112 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from helpers import AppTestCase
+import metrics
+
+def sample(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith(name + '{') or line.startswith(name + ' '):
+            if all(f'{key}="{value}"' in line for key, value in labels.items()):
+                return float(line.rsplit(' ', 1)[1])
+    return None
+
+class TestMetrics(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.CONFIG = {'METRICS_DIR': tempfile.mkdtemp()}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        metrics.configure({})
+        shutil.rmtree(cls.CONFIG['METRICS_DIR'])
+
+    def scrape(self):
+        response = self.app.test_client().get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        return response.get_data(as_text=True)
+
+    def test_request_counters_and_histograms(self):
+        client = self.app.test_client()
+        before = sample(self.scrape(), 'http_requests_total', endpoint='jobs_api.get_job', status='200') or 0
+        for _ in range(3):
+            client.get('/api/jobs/1')
+        client.get('/api/users/999999')
+        client.get('/')
+        text = self.scrape()
+        self.assertEqual(sample(text, 'http_requests_total', endpoint='jobs_api.get_job', status='200'), before + 3)
+        self.assertGreaterEqual(sample(text, 'http_requests_total', blueprint='user_api', status='404'), 1)
+        self.assertGreaterEqual(sample(text, 'http_requests_total', blueprint='views', endpoint='views.index'), 1)
+        self.assertGreaterEqual(sample(text, 'http_request_duration_seconds_count', endpoint='jobs_api.get_job'), 3)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', endpoint='jobs_api.get_job', le='+Inf'),
+                         sample(text, 'http_request_duration_seconds_count', endpoint='jobs_api.get_job'))
+        self.assertGreater(sample(text, 'db_queries_total', endpoint='jobs_api.get_job'), 0)
+        self.assertGreater(sample(text, 'db_pool_checkout_duration_seconds_count'), 0)
+        self.assertIsNotNone(sample(text, 'cache_hits_total', cache='response'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+
+    def test_password_hash_time(self):
+        self.login(self.app.test_client())
+        self.assertGreaterEqual(sample(self.scrape(), 'password_hash_duration_seconds_count', operation='verify'), 1)
+
+    def run_worker(self, requests):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                client = self.app.test_client()
+                for _ in range(requests):
+                    client.get('/api/jobs/1')
+                metrics.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+    def worker_files(self):
+        return glob.glob(os.path.join(self.CONFIG['METRICS_DIR'], 'metrics-*-*.json'))
+
+    def test_worker_processes_are_aggregated(self):
+        before = sample(self.scrape(), 'http_requests_total', endpoint='jobs_api.get_job', status='200') or 0
+        self.run_worker(2)
+        text = self.scrape()
+        self.assertEqual(sample(text, 'http_requests_total', endpoint='jobs_api.get_job', status='200'), before + 2)
+        self.assertEqual(len(re.findall(r'^db_pool_checked_out_connections ', text, re.M)), 1)
+
+    def test_exited_workers_are_folded_once(self):
+        before = sample(self.scrape(), 'http_requests_total', endpoint='jobs_api.get_job', status='200') or 0
+        for _ in range(3):
+            self.run_worker(1)
+        self.assertEqual(len(self.worker_files()), 4)
+        for _ in range(2):
+            text = self.scrape()
+            self.assertEqual(sample(text, 'http_requests_total', endpoint='jobs_api.get_job', status='200'),
+                             before + 3)
+            self.assertEqual(self.worker_files(), [metrics.snapshot_path()])
+
+# Imports the app as on a platform without fcntl or os.register_at_fork.
+WITHOUT_POSIX = """
+import os, sys, tempfile
+sys.modules['fcntl'] = None
+del os.register_at_fork
+from app import create_app
+import metrics
+directory = tempfile.mkdtemp()
+app = create_app({'DATABASE_URL': 'sqlite://', 'METRICS_DIR': directory, 'PASSWORD_HASH_WORKERS': 0})
+assert metrics._directory is None
+assert os.listdir(directory) == []
+response = app.test_client().get('/metrics')
+assert response.status_code == 200, response.status_code
+"""
+
+class TestWithoutPosix(unittest.TestCase):
+    def test_imports_and_serves_per_process_metrics(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', WITHOUT_POSIX], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
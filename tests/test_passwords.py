@@ -0,0 +1,82 @@
+import unittest
+from helpers import AppTestCase
+from models import Session, User, get_engine
+import passwords
+
+REHASH_METHOD = 'pbkdf2:sha256:1000'
+
+def stored_hash(email):
+    session = Session()
+    user = session.query(User).filter(User.email == email).first()
+    session.close()
+    return user._hashed_password
+
+class PasswordPoolTestCase(AppTestCase):
+    # Applied after seeding, so the seeded users get ordinary hashes.
+    PASSWORD_CONFIG = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        passwords.configure(cls.PASSWORD_CONFIG)
+
+    @classmethod
+    def tearDownClass(cls):
+        passwords.configure(cls.app.config)
+        super().tearDownClass()
+
+class TestHashingOverload(PasswordPoolTestCase):
+    PASSWORD_CONFIG = {'PASSWORD_HASH_WORKERS': 1, 'PASSWORD_HASH_TIMEOUT': 0.000001}
+
+    def assertOverloaded(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(get_engine().pool.checkedout(), 0)
+
+    def test_login_returns_503_when_hashing_times_out(self):
+        response = self.app.test_client().post('/login', data={'email': 'scott_chief@mars.org',
+                                                                'password': 'hash123'})
+        self.assertOverloaded(response)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_register_returns_503(self):
+        response = self.app.test_client().post('/register', data={
+            'surname': 'Busy', 'name': 'Register', 'age': '30', 'position': 'p', 'speciality': 's',
+            'address': 'module_1', 'email': 'busy-register@example.com', 'password': 'busypassword',
+            'password_confirm': 'busypassword'})
+        self.assertOverloaded(response)
+
+    def test_api_returns_json_503(self):
+        response = self.app.test_client().post('/api/users', json={
+            'id': 9100, 'surname': 'Busy', 'name': 'Server', 'age': 30, 'position': 'p', 'speciality': 's',
+            'address': 'module_1', 'email': 'busy@example.com', 'password': 'busypassword'})
+        self.assertOverloaded(response)
+        self.assertIn('error', response.get_json())
+
+    def test_password_edit_returns_json_503(self):
+        response = self.app.test_client().put('/api/users/2', json={'password': 'busypassword'})
+        self.assertOverloaded(response)
+        self.assertIn('error', response.get_json())
+
+    def test_bulk_import_reports_overloaded_batches(self):
+        users = [{'id': 9200 + i, 'surname': 'Bulk', 'name': f'Busy{i}', 'age': 30, 'position': 'p',
+                  'speciality': 's', 'address': 'module_1', 'email': f'busy{9200 + i}@example.com',
+                  'password': 'busypassword'} for i in range(3)]
+        response = self.app.test_client().post('/api/users/bulk?chunk_size=2', json=users)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['inserted'], 0)
+        self.assertEqual([error['row'] for error in data['errors']], [1, 2, 3])
+        self.assertTrue(all(error['error'] == 'Batch insert failed: HashingOverloaded' for error in data['errors']))
+
+class TestRehashOnLogin(PasswordPoolTestCase):
+    PASSWORD_CONFIG = {'PASSWORD_HASH_METHOD': REHASH_METHOD}
+
+    def test_login_upgrades_outdated_hash(self):
+        email = 'scott_chief@mars.org'
+        self.assertFalse(stored_hash(email).startswith(REHASH_METHOD))
+        self.login(self.app.test_client(), email)
+        self.assertTrue(stored_hash(email).startswith(REHASH_METHOD))
+        self.login(self.app.test_client(), email)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import re
+from sqlalchemy import event
+from helpers import AppTestCase
+from models import get_engine
+from reports import REPORTS
+
+CHECKED_URLS = [
+    '/api/jobs',
+    '/api/jobs?after=1&limit=2&fields=id,job',
+    '/api/jobs/1',
+    '/api/jobs?is_finished=false&work_size_max=19',
+    '/api/jobs?team_leader=1',
+    '/api/jobs?category=Research',
+    '/api/jobs?start_after=2020-01-01&start_before=2030-01-01',
+    '/api/jobs/search?q=deployment',
+    '/api/users?address=module_1',
+    '/api/users?age_min=20&age_max=30',
+    '/api/users/1',
+    '/api/departments/1',
+] + [f'/api/reports/{name}' for name in sorted(REPORTS)]
+
+# The unfiltered first page walks the primary key and stops at LIMIT; substring
+# searches cannot use a b-tree index. Every other scan is a regression.
+ALLOWED_SCANS = {
+    '/api/jobs': {'jobs'},
+    '/api/reports/chiefs-and-middles': {'users'},
+}
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+class TestQueryPlans(AppTestCase):
+    CONFIG = {'RESPONSE_CACHE_MAX_BYTES': 0}
+
+    def capture_selects(self, url):
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+        engine = get_engine()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = self.app.test_client().get(url)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200, url)
+        return statements
+
+    def full_scans(self, statement, parameters):
+        with get_engine().connect() as connection:
+            plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        tables = set()
+        for row in plan:
+            match = FULL_SCAN.match(row[3])
+            if match and not match.group(1).startswith('anon_'):
+                tables.add(match.group(1))
+        return tables
+
+    def test_no_full_table_scans(self):
+        for url in CHECKED_URLS:
+            with self.subTest(url=url):
+                statements = self.capture_selects(url)
+                self.assertTrue(statements, url)
+                for statement, parameters in statements:
+                    scans = self.full_scans(statement, parameters) - ALLOWED_SCANS.get(url, set())
+                    self.assertFalse(scans, f'{url} scans {sorted(scans)}: {statement}')
+
+
+if __name__ == '__main__':
+    unittest.main()
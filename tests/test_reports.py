@@ -0,0 +1,76 @@
+import unittest
+import contextlib
+import io
+from helpers import AppTestCase
+from models import Session, Department
+import main
+
+# Seeded: job 1 (leader 1, 15h, collaborators 2 and 3) and department 1 (members 2, 3 and 5).
+REPORT_JOBS = [
+    {'id': 900, 'team_leader': 2, 'job': 'Drill core samples', 'work_size': 10, 'collaborators': '3, 5, 6'},
+    {'id': 901, 'team_leader': 4, 'job': 'Repair the airlock', 'work_size': 20, 'collaborators': '2, 4, 5'},
+    {'id': 902, 'team_leader': 1, 'job': 'Calibrate sensors', 'work_size': 7, 'collaborators': '5'},
+]
+
+class TestReports(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        client = cls.app.test_client()
+        for job in REPORT_JOBS:
+            assert client.post('/api/jobs', json=job).status_code == 201
+        session = Session()
+        hangar = Department(id=2, title='Hangar', chief=4, email='hangar@mars.org')
+        hangar.set_members(session, '4, 6')
+        session.add(hangar)
+        session.commit()
+        session.close()
+
+    def report(self, name, **params):
+        response = self.app.test_client().get(f'/api/reports/{name}', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['rows']
+
+    def run_command(self, argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.run_report_command(argv)
+        return output.getvalue()
+
+    def test_largest_team_leaders(self):
+        self.assertEqual(self.report('largest-team-leaders'), [
+            {'job_id': 900, 'id': 2, 'surname': 'Theslave', 'name': 'Gael', 'team_size': 3},
+            {'job_id': 901, 'id': 4, 'surname': 'Gigant', 'name': 'Yourm', 'team_size': 3},
+        ])
+
+    def test_department_member_hours(self):
+        self.assertEqual(self.report('department-member-hours'), [
+            {'id': 2, 'surname': 'Theslave', 'name': 'Gael', 'total_hours': 35},
+            {'id': 5, 'surname': 'Fireceper', 'name': 'Cute', 'total_hours': 37},
+        ])
+        self.assertEqual([(row['id'], row['total_hours']) for row in self.report(
+            'department-member-hours', department_id=1, min_hours=0)], [(2, 35), (3, 25), (5, 37)])
+        self.assertEqual([(row['id'], row['total_hours']) for row in self.report(
+            'department-member-hours', department_id=2, min_hours=0)], [(4, 20), (6, 10)])
+
+    def test_small_unfinished_jobs(self):
+        self.assertEqual([row['id'] for row in self.report('small-unfinished-jobs', max_work_size=10)], [900, 902])
+
+    def test_command_csv_with_params(self):
+        output = self.run_command(['department-member-hours', '--param', 'department_id=1',
+                                   '--param', 'min_hours=36', '--format', 'csv'])
+        self.assertEqual(output.splitlines(), ['id,surname,name,total_hours', '5,Fireceper,Cute,37'])
+
+    def test_command_ignores_unknown_and_malformed_params(self):
+        output = self.run_command(['largest-team-leaders', '--param', 'department_id=1', '--param', 'oops',
+                                   '--format', 'csv'])
+        self.assertEqual(output.splitlines(), ['job_id,id,surname,name,team_size',
+                                               '900,2,Theslave,Gael,3', '901,4,Gigant,Yourm,3'])
+
+    def test_command_rejects_invalid_param_values(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as raised:
+            self.run_command(['minors', '--param', 'max_age=abc'])
+        self.assertEqual(raised.exception.code, 2)
+
+if __name__ == '__main__':
+    unittest.main()
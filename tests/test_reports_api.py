@@ -0,0 +1,43 @@
+import unittest
+import requests
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_URL = 'http://127.0.0.1:5000'
+
+class TestReportsAPI(unittest.TestCase):
+    def test_list_reports(self):
+        response = requests.get(f'{BASE_URL}/api/reports')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('largest-team-leaders', response.json()['reports'])
+
+    def test_largest_team_leaders(self):
+        response = requests.get(f'{BASE_URL}/api/reports/largest-team-leaders')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['rows']
+        team_sizes = {row['team_size'] for row in rows}
+        self.assertLessEqual(len(team_sizes), 1)
+
+    def test_department_member_hours(self):
+        response = requests.get(f'{BASE_URL}/api/reports/department-member-hours?department_id=1&min_hours=0')
+        self.assertEqual(response.status_code, 200)
+        for row in response.json()['rows']:
+            self.assertIn('total_hours', row)
+
+    def test_report_csv(self):
+        response = requests.get(f'{BASE_URL}/api/reports/minors?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['Content-Type'].startswith('text/csv'))
+
+    def test_report_invalid_params(self):
+        response = requests.get(f'{BASE_URL}/api/reports/minors?max_age=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_report(self):
+        response = requests.get(f'{BASE_URL}/api/reports/unknown')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from helpers import AppTestCase
+from models import Session, User
+import instrumentation
+
+THRESHOLD = 3
+
+class TestSQLInstrumentation(AppTestCase):
+    CONFIG = {'RESPONSE_CACHE_MAX_BYTES': 0, 'N_PLUS_ONE_THRESHOLD': THRESHOLD}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        @cls.app.route('/_test/repeated')
+        def repeated():
+            session = Session()
+            for user_id in range(1, THRESHOLD + 3):
+                session.get(User, user_id)
+            session.close()
+            return 'ok'
+
+    def test_server_timing_header(self):
+        response = self.app.test_client().get('/api/jobs/1')
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(timing, r'app;dur=[\d.]+')
+        self.assertNotIn('n-plus-one', timing)
+
+    def test_repeated_statement_is_flagged(self):
+        with self.assertLogs('mars_explorer.sql', level='WARNING') as logs:
+            response = self.app.test_client().get('/_test/repeated')
+        self.assertIn('n-plus-one', response.headers['Server-Timing'])
+        self.assertIn('FROM users WHERE users.id = ?', logs.output[0])
+
+    def test_in_lists_share_a_shape(self):
+        self.assertEqual(instrumentation.statement_shape('SELECT * FROM users WHERE id IN (?, ?,\n ?)'),
+                         instrumentation.statement_shape('SELECT * FROM users WHERE id IN (?)'))
+
+    def test_job_forms_do_not_repeat_statements(self):
+        client = self.login(self.app.test_client())
+        form = {'team_leader_id': '1', 'job_description': 'instrumented', 'work_size': '5',
+                'collaborators': '2, 3, 4, 5', 'categories': ['1', '2', '3', '4', '5']}
+        for url in ('/add_job', '/edit_job/1'):
+            response = client.post(url, data=form)
+            self.assertEqual(response.status_code, 302, url)
+            self.assertNotIn('/login', response.location, url)
+            self.assertNotIn('n-plus-one', response.headers['Server-Timing'], url)
+
+    def test_track_outside_requests(self):
+        with instrumentation.track('repeated lookups', threshold=THRESHOLD) as stats:
+            session = Session()
+            for user_id in range(1, THRESHOLD + 3):
+                session.get(User, user_id)
+            session.close()
+        self.assertEqual(stats['queries'], THRESHOLD + 2)
+        self.assertEqual(len(instrumentation.repeated_statements(stats, THRESHOLD)), 1)
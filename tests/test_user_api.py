@@ -4,6 +4,7 @@ import requests
 import json
 import sys
 import os
+import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import engine, Base, Session
 from main import User, Jobs, Category, association_table
@@ -21,6 +22,84 @@ class TestUserAPI(unittest.TestCase):
         data = response.json()
         self.assertIn('users', data)
 
+    def test_get_users_filtered(self):
+        response = requests.get(f'{BASE_URL}/api/users?address=module_1&age_max=20&count=true')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total'], len(data['users']))
+        for user in data['users']:
+            self.assertEqual(user['address'], 'module_1')
+            self.assertLessEqual(user['age'], 20)
+
+    def test_get_users_position_substring(self):
+        response = requests.get(f'{BASE_URL}/api/users?position=engineer')
+        self.assertEqual(response.status_code, 200)
+        for user in response.json()['users']:
+            self.assertIn('engineer', user['position'])
+
+    def test_get_users_sorted_and_paged(self):
+        response = requests.get(f'{BASE_URL}/api/users?sort=-age&limit=2')
+        self.assertEqual(response.status_code, 200)
+        users = response.json()['users']
+        self.assertLessEqual(len(users), 2)
+        ages = [user['age'] for user in users]
+        self.assertEqual(ages, sorted(ages, reverse=True))
+
+    def test_get_users_not_modified(self):
+        response = requests.get(f'{BASE_URL}/api/users?limit=2')
+        etag = response.headers['ETag']
+        cached = requests.get(f'{BASE_URL}/api/users?limit=2', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+
+        user = requests.get(f'{BASE_URL}/api/users/2').json()['user']
+        requests.put(f'{BASE_URL}/api/users/2', json={'city_from': user['city_from']})
+        changed = requests.get(f'{BASE_URL}/api/users?limit=2', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_get_user_not_found_has_no_etag(self):
+        response = requests.get(f'{BASE_URL}/api/users/999999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_get_users_invalid_sort(self):
+        response = requests.get(f'{BASE_URL}/api/users?sort=hashed_password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_users_invalid_filter_value(self):
+        for query in ('age_min=abc', 'age_max=1.5'):
+            response = requests.get(f'{BASE_URL}/api/users?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertEqual(response.json().get('error'), 'Invalid filter value')
+        response = requests.get(f'{BASE_URL}/api/users/export?age_min=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_users_invalid_paging(self):
+        for query in ('limit=abc', 'offset=abc', 'limit=', 'offset=-1'):
+            response = requests.get(f'{BASE_URL}/api/users?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_export_users_ndjson(self):
+        total = requests.get(f'{BASE_URL}/api/users?count=true').json()['total']
+        response = requests.get(f'{BASE_URL}/api/users/export', stream=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/x-ndjson')
+        users = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertEqual(len(users), total)
+        self.assertNotIn('hashed_password', users[0])
+        self.assertEqual([user['id'] for user in users], sorted(user['id'] for user in users))
+
+    def test_export_users_csv_filtered(self):
+        response = requests.get(f'{BASE_URL}/api/users/export?format=csv&address=module_1')
+        self.assertEqual(response.status_code, 200)
+        lines = response.text.splitlines()
+        self.assertTrue(lines[0].startswith('id,surname,name'))
+        self.assertTrue(all(',module_1,' in line for line in lines[1:]))
+
+    def test_export_users_invalid_format(self):
+        response = requests.get(f'{BASE_URL}/api/users/export?format=xml')
+        self.assertEqual(response.status_code, 400)
+
     def test_get_single_user_valid(self):
         response = requests.get(f'{BASE_URL}/api/users/1')
         self.assertEqual(response.status_code, 200)
@@ -183,6 +262,67 @@ class TestUserAPI(unittest.TestCase):
         response = requests.post(f'{BASE_URL}/api/users', data='not json')
         self.assertEqual(response.status_code, 415)
 
+    def test_bulk_add_users_throughput(self):
+        count = 20
+        users = [{
+            "id": 7000 + i,
+            "surname": "Bulk",
+            "name": f"User{i}",
+            "age": 20 + i % 30,
+            "position": "bulk",
+            "speciality": "importing",
+            "address": "module_bulk",
+            "email": f"bulk{7000 + i}@example.com",
+            "password": f"bulkpassword{i}"
+        } for i in range(count)]
+        users.append(dict(users[0], id=7999))
+        started = time.perf_counter()
+        response = requests.post(f'{BASE_URL}/api/users/bulk?chunk_size=8', json=users)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['inserted'], count)
+        self.assertEqual(data['errors'][0]['error'], 'Email already registered')
+        throughput = count / elapsed
+        print(f"bulk user import: {count} users in {elapsed:.2f}s ({throughput:.1f} users/s)")
+        self.assertGreater(throughput, 1, f"{throughput:.1f} users/s")
+
+        login_check = requests.get(f'{BASE_URL}/api/users/7005')
+        self.assertEqual(login_check.json()['user']['email'], 'bulk7005@example.com')
+        for user in users[:count]:
+            requests.delete(f'{BASE_URL}/api/users/{user["id"]}')
+
+    def test_bulk_add_users_csv(self):
+        body = ("id,surname,name,age,position,speciality,address,email,city_from,password\n"
+                "7101,Csv,One,30,csv,importing,module_csv,csv7101@example.com,Oslo,pw1\n"
+                "7102,Csv,Two,abc,csv,importing,module_csv,csv7102@example.com,,pw2\n")
+        response = requests.post(f'{BASE_URL}/api/users/bulk', data=body, headers={'Content-Type': 'text/csv'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['inserted'], 1)
+        self.assertEqual(data['errors'][0]['row'], 2)
+        requests.delete(f'{BASE_URL}/api/users/7101')
+
+    def test_bulk_add_users_mistyped_rows(self):
+        valid = {"surname": "Typed", "name": "User", "age": 30, "position": "bulk", "speciality": "importing",
+                 "address": "module_bulk", "password": "typedpassword"}
+        users = [
+            dict(valid, id=7201, email=["typed7201@example.com"]),
+            dict(valid, id=7202, email={"address": "typed7202@example.com"}),
+            dict(valid, id=7203, email="typed7203@example.com", age=True),
+            dict(valid, id=7204, email="typed7204@example.com", age=30.5),
+            dict(valid, id=7205, email="typed7205@example.com", password=12345),
+            dict(valid, id=7206, email="typed7206@example.com", city_from=["Oslo"]),
+            dict(valid, id="7207", email="typed7207@example.com", age="31"),
+        ]
+        response = requests.post(f'{BASE_URL}/api/users/bulk', json=users)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['inserted'], 1)
+        self.assertEqual([error['row'] for error in data['errors']], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(requests.get(f'{BASE_URL}/api/users/7207').json()['user']['age'], 31)
+        requests.delete(f'{BASE_URL}/api/users/7207')
+
     def test_delete_user_valid(self):
         new_user_data = {
             "surname": "ToBe",
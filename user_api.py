@@ -1,40 +1,118 @@
-from flask import Blueprint, jsonify, request
-from main import Session, User
+import csv
+import datetime
+import io
+from flask import Blueprint, current_app, jsonify, request
+from models import Session, User
+from etags import conditional
+import response_cache
+from export import DEFAULT_EXPORT_CHUNK_SIZE, EXPORT_MIMETYPES, export_response
+import auth
+import passwords
+import user_service
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import generate_password_hash
 user_api = Blueprint('user_api', __name__)
 
 def get_users_with_details(users_list):
-    result = []
-    for user in users_list:
-        user_dict = {
-            'id': user.id,
-            'surname': user.surname,
-            'name': user.name,
-            'age': user.age,
-            'position': user.position,
-            'speciality': user.speciality,
-            'address': user.address,
-            'email': user.email,
-            'city_from': user.city_from
-        }
-        result.append(user_dict)
-    return result
+    return [user_service.user_to_dict(user) for user in users_list]
+
+SORTABLE_FIELDS = ('id', 'surname', 'name', 'age', 'position', 'speciality', 'address', 'email', 'city_from')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_BULK_CHUNK_SIZE = 500
+MAX_BULK_CHUNK_SIZE = 5000
+USER_REQUIRED_FIELDS = ('id', 'surname', 'name', 'age', 'position', 'speciality', 'address', 'email', 'password')
+USER_TEXT_FIELDS = ('surname', 'name', 'position', 'speciality', 'address', 'email', 'password')
+
+def parse_sort(sort_str):
+    order_by = []
+    sorted_fields = set()
+    for item in (sort_str or 'id').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith('-')
+        field = item.lstrip('-')
+        if field not in SORTABLE_FIELDS:
+            return None
+        column = getattr(User, field)
+        order_by.append(column.desc() if descending else column.asc())
+        sorted_fields.add(field)
+    if 'id' not in sorted_fields:
+        order_by.append(User.id.asc())
+    return order_by
+
+def build_users_filter(args):
+    conditions = []
+    if args.get('address'):
+        conditions.append(User.address == args['address'])
+    if args.get('position'):
+        conditions.append(User.position.contains(args['position']))
+    if args.get('speciality'):
+        conditions.append(User.speciality.contains(args['speciality']))
+    if args.get('age_min'):
+        conditions.append(User.age >= int(args['age_min']))
+    if args.get('age_max'):
+        conditions.append(User.age <= int(args['age_max']))
+    return conditions
 
 @user_api.route('/api/users', methods=['GET'])
+@conditional('users')
 def get_users():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        limit = offset = None
+    if limit is None or limit < 1 or limit > MAX_PAGE_SIZE or offset < 0:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}, offset must not be negative'}), 400
+
+    order_by = parse_sort(request.args.get('sort'))
+    if order_by is None:
+        return jsonify({'error': 'Unknown sort field'}), 400
+
+    try:
+        conditions = build_users_filter(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid filter value'}), 400
     session = Session()
-    users = session.query(User).all()
+    users = session.query(User).filter(*conditions).order_by(*order_by).limit(limit).offset(offset).all()
+    result = {'users': get_users_with_details(users)}
+    if request.args.get('count') in ('1', 'true'):
+        result['total'] = session.query(func.count(User.id)).filter(*conditions).scalar()
     session.close()
-    return jsonify({'users': get_users_with_details(users)})
+    return jsonify(result)
+
+def iter_user_chunks(conditions, chunk_size):
+    query = select(User).where(*conditions).order_by(User.id).execution_options(yield_per=chunk_size)
+    session = Session()
+    try:
+        for users in session.scalars(query).partitions():
+            yield get_users_with_details(users)
+    finally:
+        session.close()
+
+@user_api.route('/api/users/export', methods=['GET'])
+def export_users():
+    output_format = request.args.get('format', 'ndjson')
+    if output_format not in EXPORT_MIMETYPES:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    try:
+        conditions = build_users_filter(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid filter value'}), 400
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+    return export_response(iter_user_chunks(conditions, chunk_size), output_format, user_service.USER_FIELDS, 'users')
 
 @user_api.route('/api/users/<int:user_id>', methods=['GET'])
+@conditional('users')
 def get_user(user_id):
-    session = Session()
-    user = session.query(User).filter(User.id == user_id).first()
-    session.close()
+    user = user_service.get_user(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    return jsonify({'user': get_users_with_details([user])[0]})
+    return jsonify({'user': user})
 
 @user_api.route('/api/users', methods=['POST'])
 def add_user():
@@ -43,49 +121,157 @@ def add_user():
         return jsonify({'error': 'No data provided'}), 400
 
     session = Session()
-    existing_user = session.query(User).filter(User.id == data.get('id')).first()
-    if existing_user:
-        session.close()
-        return jsonify({'error': 'Id already exists'}), 400
-
-    user_id = data.get('id')
-    surname = data.get('surname')
-    name = data.get('name')
-    age = data.get('age')
-    position = data.get('position')
-    speciality = data.get('speciality')
-    address = data.get('address')
-    email = data.get('email')
-    city_from = data.get('city_from')
-    password = data.get('password')
-
-    if not all([user_id, surname, name, age, position, speciality, address, email, password]):
-        session.close()
-        return jsonify({'error': 'Missing required fields'}), 400
+    try:
+        existing_user = session.query(User).filter(User.id == data.get('id')).first()
+        if existing_user:
+            return jsonify({'error': 'Id already exists'}), 400
+
+        user_id = data.get('id')
+        surname = data.get('surname')
+        name = data.get('name')
+        age = data.get('age')
+        position = data.get('position')
+        speciality = data.get('speciality')
+        address = data.get('address')
+        email = data.get('email')
+        city_from = data.get('city_from')
+        password = data.get('password')
 
-    existing_email = session.query(User).filter(User.email == email).first()
-    if existing_email:
+        if not all([user_id, surname, name, age, position, speciality, address, email, password]):
+            return jsonify({'error': 'Missing required fields'}), 400
+
+        existing_email = session.query(User).filter(User.email == email).first()
+        if existing_email:
+            return jsonify({'error': 'Email already registered'}), 400
+
+        new_user = User(
+            id=user_id,
+            surname=surname,
+            name=name,
+            age=age,
+            position=position,
+            speciality=speciality,
+            address=address,
+            email=email,
+            city_from=city_from
+        )
+        new_user.set_password(password)
+
+        session.add(new_user)
+        session.commit()
+    finally:
         session.close()
-        return jsonify({'error': 'Email already registered'}), 400
-
-    new_user = User(
-        id=user_id,
-        surname=surname,
-        name=name,
-        age=age,
-        position=position,
-        speciality=speciality,
-        address=address,
-        email=email,
-        city_from=city_from
-    )
-    new_user.set_password(password)
-
-    session.add(new_user)
-    session.commit()
-    session.close()
+    response_cache.invalidate('users')
     return jsonify({'success': 'User added successfully'}), 201
 
+def parse_bulk_user(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
+    if not all(data.get(field) for field in USER_REQUIRED_FIELDS):
+        return None, 'Missing required fields'
+    if not all(isinstance(data[field], str) for field in USER_TEXT_FIELDS) or \
+            not isinstance(data.get('city_from') or '', str):
+        return None, 'Text fields must be strings'
+    if not all(isinstance(data[field], (int, str)) and not isinstance(data[field], bool) for field in ('id', 'age')):
+        return None, 'Id and age must be integers'
+    try:
+        user_id = int(data['id'])
+        age = int(data['age'])
+    except ValueError:
+        return None, 'Id and age must be integers'
+    row = {
+        'id': user_id,
+        'surname': data['surname'],
+        'name': data['name'],
+        'age': age,
+        'position': data['position'],
+        'speciality': data['speciality'],
+        'address': data['address'],
+        'email': data['email'],
+        'city_from': data.get('city_from') or None
+    }
+    return (row, data['password']), None
+
+def insert_user_batch(session, batch, errors):
+    ids = [row['id'] for _, (row, password) in batch]
+    emails = [row['email'] for _, (row, password) in batch]
+    conflicts = session.execute(
+        select(User.id, User.email).where(or_(User.id.in_(ids), User.email.in_(emails)))
+    ).all()
+    existing_ids = {user_id for user_id, _ in conflicts}
+    existing_emails = {email for _, email in conflicts}
+
+    accepted = []
+    for row_no, (row, password) in batch:
+        if row['id'] in existing_ids:
+            errors.append({'row': row_no, 'id': row['id'], 'error': 'Id already exists'})
+            continue
+        if row['email'] in existing_emails:
+            errors.append({'row': row_no, 'id': row['id'], 'error': 'Email already registered'})
+            continue
+        existing_ids.add(row['id'])
+        existing_emails.add(row['email'])
+        accepted.append((row_no, (row, password)))
+    if not accepted:
+        return 0
+
+    try:
+        hashes = passwords.hash_passwords([password for _, (row, password) in accepted])
+        now = datetime.datetime.now()
+        rows = []
+        for (_, (row, password)), hashed_password in zip(accepted, hashes):
+            rows.append(dict(row, hashed_password=hashed_password, modified_date=now, credential_version=0))
+        session.execute(User.__table__.insert(), rows)
+        session.commit()
+        response_cache.invalidate('users')
+    except (SQLAlchemyError, passwords.HashingOverloaded) as e:
+        session.rollback()
+        for row_no, (row, password) in accepted:
+            errors.append({'row': row_no, 'id': row['id'], 'error': f'Batch insert failed: {e.__class__.__name__}'})
+        return 0
+    return len(rows)
+
+def read_bulk_users():
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    data = request.get_json(silent=True)
+    return data if isinstance(data, list) else None
+
+@user_api.route('/api/users/bulk', methods=['POST'])
+def bulk_add_users():
+    if request.mimetype not in ('application/json', 'text/csv'):
+        return jsonify({'error': 'Expected a JSON array or text/csv body'}), 415
+    default_chunk_size = current_app.config.get('BULK_USER_CHUNK_SIZE', DEFAULT_BULK_CHUNK_SIZE)
+    chunk_size = request.args.get('chunk_size', default_chunk_size, type=int)
+    if chunk_size < 1 or chunk_size > MAX_BULK_CHUNK_SIZE:
+        return jsonify({'error': f'chunk_size must be between 1 and {MAX_BULK_CHUNK_SIZE}'}), 400
+
+    records = read_bulk_users()
+    if records is None:
+        return jsonify({'error': 'Expected a JSON array of users'}), 400
+
+    session = Session()
+    inserted = 0
+    errors = []
+    batch = []
+    try:
+        for row_no, data in enumerate(records, 1):
+            parsed, error = parse_bulk_user(data)
+            if error:
+                errors.append({'row': row_no, 'error': error})
+                continue
+            batch.append((row_no, parsed))
+            if len(batch) >= chunk_size:
+                inserted += insert_user_batch(session, batch, errors)
+                batch = []
+        if batch:
+            inserted += insert_user_batch(session, batch, errors)
+    finally:
+        session.close()
+
+    errors.sort(key=lambda e: e['row'])
+    return jsonify({'inserted': inserted, 'failed': len(errors), 'errors': errors})
+
 @user_api.route('/api/users/<int:user_id>', methods=['DELETE'])
 def delete_user_api(user_id):
     session = Session()
@@ -96,7 +282,9 @@ def delete_user_api(user_id):
 
     session.delete(user)
     session.commit()
+    response_cache.invalidate('users')
     session.close()
+    auth.invalidate_user(user_id)
     return jsonify({'success': 'User deleted successfully'})
 
 @user_api.route('/api/users/<int:user_id>', methods=['PUT'])
@@ -106,34 +294,39 @@ def edit_user_api(user_id):
         return jsonify({'error': 'No data provided'}), 400
 
     session = Session()
-    user = session.query(User).filter(User.id == user_id).first()
-    if not user:
-        session.close()
-        return jsonify({'error': 'User not found'}), 404
+    try:
+        user = session.query(User).filter(User.id == user_id).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
 
-    if 'surname' in data:
-        user.surname = data['surname']
-    if 'name' in data:
-        user.name = data['name']
-    if 'age' in data:
-        user.age = data['age']
-    if 'position' in data:
-        user.position = data['position']
-    if 'speciality' in data:
-        user.speciality = data['speciality']
-    if 'address' in data:
-        user.address = data['address']
-    if 'email' in data:
-        existing_email = session.query(User).filter(User.email == data['email'], User.id != user_id).first()
-        if existing_email:
-            session.close()
-            return jsonify({'error': 'Email already registered by another user'}), 400
-        user.email = data['email']
-    if 'city_from' in data:
-        user.city_from = data['city_from']
-    if 'password' in data:
-        user.set_password(data['password'])
+        if 'surname' in data:
+            user.surname = data['surname']
+        if 'name' in data:
+            user.name = data['name']
+        if 'age' in data:
+            user.age = data['age']
+        if 'position' in data:
+            user.position = data['position']
+        if 'speciality' in data:
+            user.speciality = data['speciality']
+        if 'address' in data:
+            user.address = data['address']
+        if 'email' in data:
+            existing_email = session.query(User).filter(User.email == data['email'], User.id != user_id).first()
+            if existing_email:
+                return jsonify({'error': 'Email already registered by another user'}), 400
+            if data['email'] != user.email:
+                user.email = data['email']
+                user.bump_credential_version()
+        if 'city_from' in data:
+            user.city_from = data['city_from']
+        if 'password' in data:
+            user.set_password(data['password'])
+        user.touch()
 
-    session.commit()
-    session.close()
+        session.commit()
+    finally:
+        session.close()
+    response_cache.invalidate('users')
+    auth.invalidate_user(user_id)
     return jsonify({'success': 'User updated successfully'})
@@ -0,0 +1,41 @@
+import threading
+from models import Session, User
+
+REMOTE_TIMEOUT = (3.05, 10)
+REMOTE_POOL_SIZE = 10
+USER_FIELDS = ('id', 'surname', 'name', 'age', 'position', 'speciality', 'address', 'email', 'city_from')
+
+_http_session = None
+_http_lock = threading.Lock()
+
+def user_to_dict(user):
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+def get_user(user_id):
+    session = Session()
+    user = session.get(User, user_id)
+    session.close()
+    if not user:
+        return None
+    return user_to_dict(user)
+
+def http_session():
+    global _http_session
+    if _http_session is None:
+        with _http_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                http = requests.Session()
+                adapter = HTTPAdapter(pool_connections=REMOTE_POOL_SIZE, pool_maxsize=REMOTE_POOL_SIZE)
+                http.mount('http://', adapter)
+                http.mount('https://', adapter)
+                _http_session = http
+    return _http_session
+
+def fetch_remote_user(api_base_url, user_id, timeout=REMOTE_TIMEOUT):
+    response = http_session().get(f"{api_base_url.rstrip('/')}/api/users/{user_id}", timeout=timeout)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json().get('user')